@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# =======================
+# POOL CONFIG (env driven)
+# =======================
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))     # seconds to wait for checkout
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))    # seconds, -1 disables
+
+# Used by the connection budget calculator
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))        # uvicorn/gunicorn workers
+PG_MAX_CONNECTIONS = int(os.getenv("PG_MAX_CONNECTIONS", "100"))
+PG_RESERVED_CONNECTIONS = int(os.getenv("PG_RESERVED_CONNECTIONS", "3"))
+
+# Checkout wait buckets, in milliseconds (last bucket is +Inf)
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def pool_settings() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+
+def connection_budget(
+    workers: int = WEB_CONCURRENCY,
+    engines_per_worker: int = 2,   # sync + async engine
+) -> dict:
+    per_engine = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    per_worker = per_engine * engines_per_worker
+    worst_case = per_worker * workers
+    available = PG_MAX_CONNECTIONS - PG_RESERVED_CONNECTIONS
+
+    return {
+        "workers": workers,
+        "engines_per_worker": engines_per_worker,
+        "max_connections_per_engine": per_engine,
+        "max_connections_per_worker": per_worker,
+        "max_connections_total": worst_case,
+        "postgres_available": available,
+        "headroom": available - worst_case,
+        "fits": worst_case <= available,
+        # largest pool_size that still fits with the current overflow
+        "max_pool_size_that_fits": max(
+            available // max(workers * engines_per_worker, 1) - DB_MAX_OVERFLOW,
+            0,
+        ),
+    }
+
+
+# =======================
+# POOL STATISTICS
+# =======================
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.in_use_peak = 0
+            self._in_use = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, elapsed_ms: float):
+        with self._lock:
+            self.wait_total_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def on_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self._in_use += 1
+            self.in_use_peak = max(self.in_use_peak, self._in_use)
+
+    def on_checkin(self):
+        with self._lock:
+            self.checkins += 1
+            self._in_use = max(self._in_use - 1, 0)
+
+    def on_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def on_invalidate(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            histogram = {
+                f"le_{bound}ms": count
+                for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)
+            }
+            histogram["le_inf"] = self.wait_buckets[-1]
+
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "in_use_peak": self.in_use_peak,
+                "wait_ms": {
+                    "count": waits,
+                    "avg": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+                    "max": round(self.wait_max_ms, 3),
+                    "histogram": histogram,
+                },
+            }
+
+
+class _TimedCheckoutMixin:
+    # Pool events fire once a connection is handed out, so the time spent
+    # waiting for a free slot is measured around connect() instead.
+    stats: PoolStats | None = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            if self.stats is not None:
+                self.stats.record_timeout()
+            raise
+        if self.stats is not None:
+            self.stats.record_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps the pool; keep collecting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine) -> PoolStats:
+    pool = engine.pool
+    stats = PoolStats()
+    pool.stats = stats
+
+    event.listen(pool, "checkout", lambda *args: stats.on_checkout())
+    event.listen(pool, "checkin", lambda *args: stats.on_checkin())
+    event.listen(pool, "connect", lambda *args: stats.on_connect())
+    event.listen(pool, "invalidate", lambda *args: stats.on_invalidate())
+
+    return stats
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # negative while the pool is still filling up
+                "overflow": max(pool.overflow(), 0),
+                "timeout": pool.timeout(),
+            }
+        )
+
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status["stats"] = stats.snapshot()
+
+    return status
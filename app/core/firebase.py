@@ -1,8 +1,14 @@
 import json
 import os
+import threading
 import firebase_admin
 from firebase_admin import credentials
 
+_init_lock = threading.Lock()
+# set after the first init attempt, so an unconfigured (or broken) service
+# account is reported once instead of on every get_firebase_app() call
+_init_attempted = False
+
 def init_firebase():
     if firebase_admin._apps:
         return
@@ -20,3 +26,20 @@ def init_firebase():
         print("✅ Firebase Admin initialized")
     except Exception as e:
         print("❌ Firebase init failed:", e)
+
+
+def get_firebase_app():
+    """
+    The Firebase Admin app, initialised on first use rather than at startup.
+    None when FIREBASE_SERVICE_ACCOUNT is not configured.
+    """
+    global _init_attempted
+    if not firebase_admin._apps and not _init_attempted:
+        with _init_lock:
+            if not _init_attempted:
+                init_firebase()
+                _init_attempted = True
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        return None
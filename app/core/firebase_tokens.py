@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+
+from google.auth import jwt as google_jwt
+
+from app.core.cache import TTLCache
+from app.core.firebase import get_firebase_app
+
+# =======================
+# FIREBASE ID TOKEN CONFIG
+# =======================
+# Same checks as firebase_admin.auth.verify_id_token (RS256, kid, aud,
+# iss, sub, exp/iat), but the signing certs are held in memory for their
+# Cache-Control max-age and a token that already verified is answered from
+# a digest-keyed cache until its own exp.
+
+FIREBASE_CERTS_URL = os.getenv(
+    "FIREBASE_CERTS_URL",
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+)
+FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
+FIREBASE_CERTS_DEFAULT_TTL = int(os.getenv("FIREBASE_CERTS_DEFAULT_TTL", "3600"))
+FIREBASE_CERTS_TIMEOUT = float(os.getenv("FIREBASE_CERTS_TIMEOUT", "5"))
+FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000"))
+FIREBASE_CLOCK_SKEW = int(os.getenv("FIREBASE_CLOCK_SKEW", "0"))   # seconds, <= 60
+
+# an unknown kid forces a refetch (key rotation), at most this often
+_UNKNOWN_KID_REFETCH_INTERVAL = 60
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidFirebaseToken(Exception):
+    pass
+
+
+def _max_age(cache_control: str | None, age: str | None) -> int:
+    match = _MAX_AGE.search(cache_control or "")
+    if not match:
+        return FIREBASE_CERTS_DEFAULT_TTL
+    return max(0, int(match.group(1)) - int(age or 0))
+
+
+# =======================
+# KEY SOURCES
+# =======================
+# get_keys(refresh=False) -> {kid: PEM certificate}
+
+class HttpCertKeySource:
+    """Google's x509 endpoint, cached for as long as its Cache-Control allows."""
+
+    def __init__(self, url: str = FIREBASE_CERTS_URL, timeout: float = FIREBASE_CERTS_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._keys: dict[str, str] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    def _fetch(self):
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            keys = json.loads(response.read())
+            ttl = _max_age(response.headers.get("Cache-Control"), response.headers.get("Age"))
+        now = time.monotonic()
+        self._keys = keys
+        self._expires_at = now + ttl
+        self._last_fetch = now
+        self.fetches += 1
+
+    def get_keys(self, refresh: bool = False) -> dict[str, str]:
+        now = time.monotonic()
+        if self._keys and now < self._expires_at and not refresh:
+            return self._keys
+
+        with self._lock:
+            now = time.monotonic()
+            stale = not self._keys or now >= self._expires_at
+            if refresh and now - self._last_fetch < _UNKNOWN_KID_REFETCH_INTERVAL:
+                refresh = False
+            if stale or refresh:
+                try:
+                    self._fetch()
+                except Exception:
+                    self.fetch_errors += 1
+                    # keep serving the previous set through a Google hiccup
+                    if not self._keys:
+                        raise
+            return self._keys
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "keys": len(self._keys),
+            "expires_in": round(max(0.0, self._expires_at - time.monotonic()), 1),
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+        }
+
+
+class StaticKeySource:
+    """Fixed key set, for tests and benchmarks."""
+
+    def __init__(self, keys: dict[str, str]):
+        self.keys = keys
+
+    def get_keys(self, refresh: bool = False) -> dict[str, str]:
+        return self.keys
+
+    def stats(self) -> dict:
+        return {"keys": len(self.keys)}
+
+
+# =======================
+# VERIFIER
+# =======================
+
+def _default_project_id() -> str | None:
+    project_id = os.getenv("FIREBASE_PROJECT_ID") or os.getenv("GOOGLE_CLOUD_PROJECT")
+    if project_id:
+        return project_id
+    app = get_firebase_app()
+    return app.project_id if app is not None else None
+
+
+class FirebaseTokenVerifier:
+    def __init__(
+        self,
+        project_id: str | None = None,
+        key_source=None,
+        cache: TTLCache | None = None,
+        clock_skew: int = FIREBASE_CLOCK_SKEW,
+    ):
+        self._project_id = project_id
+        self.key_source = key_source or HttpCertKeySource()
+        self.cache = cache or TTLCache(FIREBASE_TOKEN_CACHE_SIZE, 3600)
+        self.clock_skew = clock_skew
+
+    @property
+    def project_id(self) -> str:
+        if self._project_id is None:
+            self._project_id = _default_project_id()
+        if not self._project_id:
+            raise InvalidFirebaseToken("Firebase project id is not configured")
+        return self._project_id
+
+    def _verify_signature(self, token: str) -> dict:
+        try:
+            header = google_jwt.decode_header(token)
+        except ValueError as e:
+            raise InvalidFirebaseToken(str(e)) from e
+
+        kid = header.get("kid")
+        if header.get("alg") != "RS256" or not kid:
+            raise InvalidFirebaseToken("Firebase ID token must be RS256 with a kid")
+
+        keys = self.key_source.get_keys()
+        if kid not in keys:
+            keys = self.key_source.get_keys(refresh=True)
+        if kid not in keys:
+            raise InvalidFirebaseToken("Firebase ID token signed by an unknown key")
+
+        try:
+            return google_jwt.decode(
+                token,
+                certs={kid: keys[kid]},
+                audience=self.project_id,
+                clock_skew_in_seconds=self.clock_skew,
+            )
+        except ValueError as e:
+            raise InvalidFirebaseToken(str(e)) from e
+
+    def verify(self, token: str) -> dict:
+        """Verified claims (with `uid`), or InvalidFirebaseToken."""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self.cache.get(digest)
+        if claims is not None:
+            if claims["exp"] + self.clock_skew > time.time():
+                return dict(claims)
+            self.cache.invalidate(digest)
+
+        claims = self._verify_signature(token)
+
+        if claims.get("iss") != FIREBASE_ISSUER_PREFIX + self.project_id:
+            raise InvalidFirebaseToken("Firebase ID token has an unexpected issuer")
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise InvalidFirebaseToken("Firebase ID token has an invalid subject")
+        claims["uid"] = subject
+
+        ttl = claims["exp"] + self.clock_skew - time.time()
+        if ttl > 0:
+            self.cache.set(digest, claims, ttl=ttl)
+        return dict(claims)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self.cache.stats(),
+            "certs": self.key_source.stats(),
+        }
+
+
+firebase_verifier = FirebaseTokenVerifier()
+
+
+def get_firebase_verifier() -> FirebaseTokenVerifier:
+    """Dependency; tests override it with a StaticKeySource-backed verifier."""
+    return firebase_verifier
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from fastapi import HTTPException, status
+
+# =======================
+# HASHING POOL CONFIG
+# =======================
+# bcrypt releases the GIL while it works, so a dedicated thread pool gives
+# real parallelism without the pickling cost of a process pool, and keeps
+# hashing off AnyIO's request threadpool and the event loop.
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", str(HASH_WORKERS * 8)))
+HASH_MAX_WAIT = float(os.getenv("HASH_MAX_WAIT", "5"))  # seconds
+HASH_RETRY_AFTER = os.getenv("HASH_RETRY_AFTER", "1")   # seconds
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": HASH_RETRY_AFTER},
+    )
+
+
+class HashingPool:
+    def __init__(self, workers: int, max_queue: int, max_wait: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="hashing",
+        )
+        self._lock = threading.Lock()
+        self._pending = 0       # queued + running
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.queue_depth_peak = 0
+        self.queue_wait_total_ms = 0.0
+        self.queue_wait_max_ms = 0.0
+
+    def _wrap(self, fn, args, enqueued_at: float):
+        def task():
+            waited_ms = (time.perf_counter() - enqueued_at) * 1000
+            with self._lock:
+                self._running += 1
+                self.queue_wait_total_ms += waited_ms
+                self.queue_wait_max_ms = max(self.queue_wait_max_ms, waited_ms)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self.completed += 1
+
+        return task
+
+    def _submit(self, fn, args, bounded: bool = True):
+        with self._lock:
+            if bounded and self._pending >= self.max_queue:
+                self.rejected += 1
+                raise _overloaded()
+            self._pending += 1
+            self.submitted += 1
+            self.queue_depth_peak = max(
+                self.queue_depth_peak, self._pending - self._running
+            )
+
+        future = self._executor.submit(self._wrap(fn, args, time.perf_counter()))
+        return future
+
+    def _timed_out(self, future):
+        # a task that never started is dropped; a running one finishes on its own
+        if future.cancel():
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self.timeouts += 1
+        return _overloaded()
+
+    def run(self, fn, *args):
+        future = self._submit(fn, args)
+        try:
+            return future.result(timeout=self.max_wait)
+        except FutureTimeoutError:
+            raise self._timed_out(future)
+
+    async def run_async(self, fn, *args):
+        future = self._submit(fn, args)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                timeout=self.max_wait,
+            )
+        except asyncio.TimeoutError:
+            raise self._timed_out(future)
+
+    async def map_async(self, fn, args_list):
+        # Bulk work (e.g. /users/bulk) keeps at most `workers` jobs queued at a
+        # time, so interactive logins only ever wait behind one window of it.
+        window = asyncio.Semaphore(self.workers)
+
+        async def one(args):
+            async with window:
+                future = self._submit(fn, args, bounded=False)
+                return await asyncio.wrap_future(future)
+
+        return await asyncio.gather(*(one(args) for args in args_list))
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self._running
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait,
+                "in_flight": self._pending,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "queue_depth_peak": self.queue_depth_peak,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "queue_wait_ms": {
+                    "avg": round(self.queue_wait_total_ms / started, 3) if started else 0.0,
+                    "max": round(self.queue_wait_max_ms, 3),
+                },
+            }
+
+
+hashing_pool = HashingPool(
+    workers=HASH_WORKERS,
+    max_queue=HASH_MAX_QUEUE,
+    max_wait=HASH_MAX_WAIT,
+)
@@ -0,0 +1,138 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from calendar import timegm
+from datetime import datetime
+
+from jose import jwt
+from jose.exceptions import JWTError, ExpiredSignatureError, JWTClaimsError
+
+# =======================
+# JWT BACKEND CONFIG
+# =======================
+# jose: python-jose, generic JWS/JWT handling.
+# fast: HS256 only, straight on hmac/hashlib. Produces byte-identical tokens
+#       to jose (same header, same compact JSON) and raises jose's exception
+#       types, so the two can be swapped or mixed across workers freely.
+
+JWT_BACKEND = os.getenv("JWT_BACKEND", "fast")
+
+HS256 = "HS256"
+
+
+class JoseBackend:
+    name = "jose"
+
+    def encode(self, claims: dict, key: str) -> str:
+        return jwt.encode(claims, key, algorithm=HS256)
+
+    def decode(self, token: str, key: str) -> dict:
+        return jwt.decode(token, key, algorithms=[HS256])
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _int_date(value):
+    if isinstance(value, datetime):
+        return timegm(value.utctimetuple())
+    return value
+
+
+class FastHS256Backend:
+    name = "fast"
+
+    # what jose writes for HS256: sorted keys, no whitespace
+    HEADER = _b64encode(b'{"alg":"HS256","typ":"JWT"}')
+
+    def __init__(self):
+        self._keys: dict[str, bytes] = {}
+
+    def _key(self, key: str) -> bytes:
+        encoded = self._keys.get(key)
+        if encoded is None:
+            encoded = self._keys[key] = key.encode("utf-8")
+        return encoded
+
+    def _sign(self, signing_input: bytes, key: str) -> bytes:
+        return hmac.new(self._key(key), signing_input, hashlib.sha256).digest()
+
+    def encode(self, claims: dict, key: str) -> str:
+        claims = {
+            name: _int_date(value) if name in ("exp", "iat", "nbf") else value
+            for name, value in claims.items()
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        signing_input = self.HEADER + b"." + payload
+        return (signing_input + b"." + _b64encode(self._sign(signing_input, key))).decode("ascii")
+
+    def _check_header(self, header: bytes):
+        if header == self.HEADER:
+            return
+        try:
+            alg = json.loads(_b64decode(header)).get("alg")
+        except (ValueError, AttributeError):
+            raise JWTError("Error decoding token headers.")
+        if alg != HS256:
+            raise JWTError("The specified alg value is not allowed")
+
+    def decode(self, token: str, key: str) -> dict:
+        try:
+            raw = token.encode("ascii")
+            signing_input, _, signature = raw.rpartition(b".")
+            header, _, payload = signing_input.partition(b".")
+            if not header or not payload or b"." in payload:
+                raise ValueError
+            signature = _b64decode(signature)
+        except (ValueError, UnicodeError):
+            raise JWTError("Not enough segments")
+
+        self._check_header(header)
+
+        if not hmac.compare_digest(self._sign(signing_input, key), signature):
+            raise JWTError("Signature verification failed.")
+
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise JWTError("Invalid payload string")
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload string: must be a json object")
+
+        self._validate(claims)
+        return claims
+
+    def _validate(self, claims: dict):
+        # the subset of jose's claim checks that applies without options
+        now = int(time.time())
+        for name in ("exp", "iat", "nbf"):
+            if name in claims and not isinstance(claims[name], (int, float)):
+                raise JWTClaimsError(f"{name} must be an integer.")
+        if "nbf" in claims and claims["nbf"] > now:
+            raise JWTClaimsError("The token is not yet valid (nbf)")
+        if "exp" in claims and claims["exp"] < now:
+            raise ExpiredSignatureError("Signature has expired.")
+        if "aud" in claims:
+            raise JWTClaimsError("Invalid audience")
+        for name in ("sub", "jti"):
+            if name in claims and not isinstance(claims[name], str):
+                raise JWTClaimsError(f"{name} must be a string.")
+
+
+def make_backend(name: str = JWT_BACKEND):
+    if name == "fast":
+        return FastHS256Backend()
+    if name == "jose":
+        return JoseBackend()
+    raise ValueError(f"Unknown JWT_BACKEND: {name}")
+
+
+jwt_backend = make_backend()
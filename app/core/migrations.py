@@ -0,0 +1,146 @@
+from sqlalchemy import inspect, text
+
+from app.database import Base
+
+# =======================
+# SCHEMA BOOTSTRAP
+# =======================
+# create_all only creates missing tables, so anything added to a table that
+# already exists (extensions, indexes, columns) is applied by the idempotent
+# steps below. bootstrap() runs them around create_all; it is what
+# STARTUP_SCHEMA_MODE=create and `python -m app.core.startup create-schema`
+# execute, and schema_drift() in app/core/startup.py checks the same things.
+
+# Postgres extensions the models rely on (gin_trgm_ops, word_similarity)
+PG_EXTENSIONS = ("pg_trgm",)
+
+
+def _applies(index, dialect_name: str) -> bool:
+    # Index(...).ddl_if(dialect=...) limits an index to one backend
+    ddl_if = index._ddl_if
+    if ddl_if is None or ddl_if.dialect is None:
+        return True
+    dialects = (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+    return dialect_name in dialects
+
+
+def missing_extensions(sync_conn) -> list[str]:
+    if sync_conn.dialect.name != "postgresql":
+        return []
+    installed = set(
+        sync_conn.execute(
+            text("SELECT extname FROM pg_extension WHERE extname = ANY(:names)"),
+            {"names": list(PG_EXTENSIONS)},
+        ).scalars()
+    )
+    return [name for name in PG_EXTENSIONS if name not in installed]
+
+
+def missing_indexes(sync_conn) -> dict[str, list[str]]:
+    """{table: [index names]} for model indexes absent from existing tables."""
+    inspector = inspect(sync_conn)
+    existing_tables = set(inspector.get_table_names())
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        names = [
+            index.name
+            for index in table.indexes
+            if index.name not in existing and _applies(index, sync_conn.dialect.name)
+        ]
+        if names:
+            missing[table.name] = names
+    return missing
+
+
+# -------- steps --------
+
+def _create_extensions(sync_conn):
+    for name in missing_extensions(sync_conn):
+        sync_conn.execute(text(f'CREATE EXTENSION IF NOT EXISTS "{name}"'))
+
+
+def _create_missing_indexes(sync_conn):
+    inspector = inspect(sync_conn)
+    for table_name, names in missing_indexes(sync_conn).items():
+        table = Base.metadata.tables[table_name]
+        columns = {c["name"] for c in inspector.get_columns(table_name)}
+        for index in table.indexes:
+            # an index over a column that still needs a migration stays
+            # reported as drift instead of failing the bootstrap
+            if index.name in names and all(c.name in columns for c in index.columns):
+                index.create(sync_conn, checkfirst=True)
+
+
+def _columns(sync_conn, table_name: str) -> set[str]:
+    inspector = inspect(sync_conn)
+    if table_name not in inspector.get_table_names():
+        return set()
+    return {c["name"] for c in inspector.get_columns(table_name)}
+
+
+def _migrate_refresh_tokens(sync_conn):
+    """Plaintext `token` column -> token_digest + family_id (digest-keyed store)."""
+    if "token" not in _columns(sync_conn, "refresh_tokens"):
+        return
+
+    if sync_conn.dialect.name != "postgresql":
+        # dev databases: no sha256() in SQL to backfill with, so start over
+        print("⚠️ Recreating refresh_tokens; existing sessions are invalidated")
+        table = Base.metadata.tables["refresh_tokens"]
+        sync_conn.execute(text("DROP TABLE refresh_tokens"))
+        table.create(sync_conn)
+        return
+
+    # Existing sessions keep working: app/core/refresh_tokens.py looks tokens
+    # up by the SHA-256 of the JWT, which is exactly what the old column held.
+    # Every old token becomes its own family.
+    for statement in (
+        "ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS token_digest BYTEA",
+        "ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS family_id VARCHAR(32)",
+        "UPDATE refresh_tokens SET"
+        " token_digest = sha256(convert_to(token, 'UTF8')),"
+        " family_id = md5(random()::text || id::text)"
+        " WHERE token_digest IS NULL",
+        "UPDATE refresh_tokens SET revoked = false WHERE revoked IS NULL",
+        "ALTER TABLE refresh_tokens"
+        " ALTER COLUMN token_digest SET NOT NULL,"
+        " ALTER COLUMN family_id SET NOT NULL,"
+        " ALTER COLUMN revoked SET NOT NULL",
+        "ALTER TABLE refresh_tokens"
+        " ADD CONSTRAINT refresh_tokens_token_digest_key UNIQUE (token_digest)",
+        # the old column stored live tokens in plaintext
+        "ALTER TABLE refresh_tokens DROP COLUMN token",
+    ):
+        sync_conn.execute(text(statement))
+
+
+def _add_otp_attempts(sync_conn):
+    """Per-code failed verify counter used by the OTP attempt budget."""
+    columns = _columns(sync_conn, "otp_codes")
+    if columns and "attempts" not in columns:
+        sync_conn.execute(
+            text("ALTER TABLE otp_codes ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        )
+
+
+# run before create_all (new tables may depend on them)
+BEFORE_CREATE = [_create_extensions]
+# run after create_all, in order, against tables that already existed;
+# column migrations first so the indexes can reference the new columns
+AFTER_CREATE = [
+    _migrate_refresh_tokens,
+    _add_otp_attempts,
+    _create_missing_indexes,
+]
+
+
+def bootstrap(sync_conn):
+    """Bring the database up to the models; safe to run on every start."""
+    for step in BEFORE_CREATE:
+        step(sync_conn)
+    Base.metadata.create_all(sync_conn)
+    for step in AFTER_CREATE:
+        step(sync_conn)
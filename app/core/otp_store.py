@@ -0,0 +1,261 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+
+from app.core.db_pool import WEB_CONCURRENCY
+from app.models.otp_code import OTPCode
+from app.utils.otp import otp_digest, otp_matches
+
+# =======================
+# OTP STORE CONFIG
+# =======================
+# memory: per-process TTL map, no database round trip on send or verify.
+#         Only correct when send and verify hit the same process, so it is
+#         the default for single-worker deployments only.
+# sql:    the otp_codes table, shared by every worker.
+
+OTP_STORE = os.getenv("OTP_STORE", "memory" if WEB_CONCURRENCY == 1 else "sql")
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "300"))
+OTP_MAX_LIVE_CODES = int(os.getenv("OTP_MAX_LIVE_CODES", "3"))
+OTP_MAX_VERIFY_ATTEMPTS = int(os.getenv("OTP_MAX_VERIFY_ATTEMPTS", "5"))
+OTP_MEMORY_MAX_IDENTIFIERS = int(os.getenv("OTP_MEMORY_MAX_IDENTIFIERS", "100000"))
+
+# Budget rules (both backends):
+# - at most OTP_MAX_LIVE_CODES unexpired codes per identifier
+# - failed verifies are counted per identifier for as long as it has live
+#   codes; once OTP_MAX_VERIFY_ATTEMPTS is reached, verify and send are
+#   refused until those codes expire, so guessing is capped per TTL window
+# - a successful verify consumes every live code and resets the count
+
+
+def _too_many(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def _locked(retry_after: float) -> HTTPException:
+    return _too_many("Too many failed attempts, request a new OTP later", retry_after)
+
+
+def _code_cap(retry_after: float) -> HTTPException:
+    return _too_many("Too many active OTPs, please wait before requesting another", retry_after)
+
+
+class _Entry:
+    __slots__ = ("codes", "failures")
+
+    def __init__(self):
+        self.codes: list[tuple[str, float]] = []   # (digest, monotonic expiry)
+        self.failures = 0
+
+
+class MemoryOTPStore:
+    name = "memory"
+
+    def __init__(self, ttl: int, max_live: int, max_attempts: int, max_identifiers: int):
+        self.ttl = ttl
+        self.max_live = max_live
+        self.max_attempts = max_attempts
+        self.max_identifiers = max_identifiers
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.verified = 0
+        self.failed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def _live(self, identifier: str, now: float) -> _Entry | None:
+        entry = self._entries.get(identifier)
+        if entry is None:
+            return None
+        entry.codes = [c for c in entry.codes if c[1] > now]
+        if not entry.codes:
+            del self._entries[identifier]
+            return None
+        return entry
+
+    def _make_room(self, now: float):
+        if len(self._entries) < self.max_identifiers:
+            return
+        for identifier in list(self._entries):
+            self._live(identifier, now)
+        while len(self._entries) >= self.max_identifiers:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def issue(self, db: Session, identifier: str, otp: str) -> datetime:
+        """Store a new code; returns its (UTC) expiry. `db` is unused."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(identifier, now)
+            if entry is None:
+                self._make_room(now)
+                entry = self._entries[identifier] = _Entry()
+            elif entry.failures >= self.max_attempts:
+                self.rejected += 1
+                raise _locked(max(c[1] for c in entry.codes) - now)
+            elif len(entry.codes) >= self.max_live:
+                self.rejected += 1
+                raise _code_cap(min(c[1] for c in entry.codes) - now)
+
+            entry.codes.append((otp_digest(identifier, otp), now + self.ttl))
+            self._entries.move_to_end(identifier)
+            self.issued += 1
+
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    def verify(self, db: Session, identifier: str, otp: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(identifier, now)
+            if entry is None:
+                self.failed += 1
+                return False
+            if entry.failures >= self.max_attempts:
+                self.rejected += 1
+                raise _locked(max(c[1] for c in entry.codes) - now)
+
+            # no early exit: every live code is compared
+            matched = False
+            for digest, _ in entry.codes:
+                matched |= otp_matches(identifier, otp, digest)
+
+            if matched:
+                del self._entries[identifier]
+                self.verified += 1
+                return True
+
+            entry.failures += 1
+            self.failed += 1
+            return False
+
+    def stats(self, db: Session | None = None) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "identifiers": len(self._entries),
+                "max_identifiers": self.max_identifiers,
+                "issued": self.issued,
+                "verified": self.verified,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "evictions": self.evictions,
+            }
+
+
+class SqlOTPStore:
+    """
+    otp_codes backed store. The failure count is kept in `attempts` on every
+    live row of the identifier (new rows inherit it), so max(attempts) is the
+    identifier's count. Works with a sync Session; issue() leaves the commit
+    to the caller, verify() commits a failed attempt itself because the
+    caller raises right after.
+    """
+
+    name = "sql"
+
+    def __init__(self, ttl: int, max_live: int, max_attempts: int):
+        self.ttl = ttl
+        self.max_live = max_live
+        self.max_attempts = max_attempts
+
+    def _live_rows(self, db: Session, identifier: str, now: datetime):
+        return db.execute(
+            select(OTPCode.id, OTPCode.otp_hash, OTPCode.attempts, OTPCode.expires_at)
+            .where(
+                OTPCode.identifier == identifier,
+                OTPCode.verified == False,
+                OTPCode.expires_at > now,
+            )
+            .order_by(OTPCode.created_at.desc())
+            .limit(self.max_live)
+            .with_for_update()
+        ).all()
+
+    def issue(self, db: Session, identifier: str, otp: str) -> datetime:
+        now = datetime.utcnow()
+        rows = self._live_rows(db, identifier, now)
+        failures = max((r.attempts for r in rows), default=0)
+
+        if failures >= self.max_attempts:
+            raise _locked((max(r.expires_at for r in rows) - now).total_seconds())
+        if len(rows) >= self.max_live:
+            raise _code_cap((min(r.expires_at for r in rows) - now).total_seconds())
+
+        expires_at = now + timedelta(seconds=self.ttl)
+        db.add(
+            OTPCode(
+                identifier=identifier,
+                otp_hash=otp_digest(identifier, otp),
+                expires_at=expires_at,
+                attempts=failures,
+            )
+        )
+        return expires_at
+
+    def verify(self, db: Session, identifier: str, otp: str) -> bool:
+        now = datetime.utcnow()
+        rows = self._live_rows(db, identifier, now)
+        if not rows:
+            return False
+
+        if max(r.attempts for r in rows) >= self.max_attempts:
+            raise _locked((max(r.expires_at for r in rows) - now).total_seconds())
+
+        matched = False
+        for row in rows:
+            matched |= otp_matches(identifier, otp, row.otp_hash)
+
+        ids = [r.id for r in rows]
+        if matched:
+            db.execute(update(OTPCode).where(OTPCode.id.in_(ids)).values(verified=True))
+            return True
+
+        db.execute(
+            update(OTPCode)
+            .where(OTPCode.id.in_(ids))
+            .values(attempts=OTPCode.attempts + 1)
+        )
+        db.commit()
+        return False
+
+    def stats(self, db: Session | None = None) -> dict:
+        result = {"backend": self.name}
+        if db is not None:
+            result["live_codes"] = db.execute(
+                select(func.count())
+                .select_from(OTPCode)
+                .where(OTPCode.verified == False, OTPCode.expires_at > datetime.utcnow())
+            ).scalar_one()
+        return result
+
+
+def make_store(name: str = OTP_STORE):
+    if name == "memory":
+        return MemoryOTPStore(
+            ttl=OTP_TTL_SECONDS,
+            max_live=OTP_MAX_LIVE_CODES,
+            max_attempts=OTP_MAX_VERIFY_ATTEMPTS,
+            max_identifiers=OTP_MEMORY_MAX_IDENTIFIERS,
+        )
+    if name == "sql":
+        return SqlOTPStore(
+            ttl=OTP_TTL_SECONDS,
+            max_live=OTP_MAX_LIVE_CODES,
+            max_attempts=OTP_MAX_VERIFY_ATTEMPTS,
+        )
+    raise ValueError(f"Unknown OTP_STORE: {name}")
+
+
+otp_store = make_store()
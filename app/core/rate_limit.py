@@ -0,0 +1,395 @@
+import asyncio
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qs
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.core.db_pool import WEB_CONCURRENCY
+
+# =======================
+# RATE LIMIT CONFIG
+# =======================
+# Token buckets: a "5/minute" limit is a bucket of 5 tokens refilled at
+# 5 per minute, so short bursts pass and sustained hammering is spread out.
+# Rules themselves are declared next to the routers in app/main.py.
+#
+# memory: per-process buckets; a client spread over N workers gets N times
+#         the limit, so this is the default for single-worker deployments.
+# sqlite: buckets in a local SQLite file shared by every worker on the host,
+#         a stand-in for a shared store such as Redis.
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory" if WEB_CONCURRENCY == 1 else "sqlite")
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    "RATE_LIMIT_SQLITE_PATH",
+    os.path.join(tempfile.gettempdir(), "habit_tracker_rate_limit.sqlite3"),
+)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# only behind a proxy that overwrites X-Forwarded-For, otherwise clients pick their own IP
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+# Form bodies are read up to this size to find the identifier; a limited
+# route whose identifier can't be read (bigger body, other content type,
+# field missing) is refused, so the per-identifier limit can't be sidestepped.
+MAX_FORM_BYTES = 16 * 1024
+FORM_CONTENT_TYPES = (b"application/x-www-form-urlencoded", b"multipart/form-data")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True, slots=True)
+class Limit:
+    capacity: int
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        # "10/minute", "100/hour"
+        count, period = spec.split("/")
+        return cls(int(count), int(count) / _PERIODS[period.strip().rstrip("s")])
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitRule:
+    path: str
+    per_ip: str | None = None
+    per_identifier: str | None = None
+    # where the account identifier lives: "query:<name>" or "form:<name>"
+    identifier: str | None = None
+    methods: tuple[str, ...] = ("POST",)
+
+
+def refill(tokens: float | None, updated: float, now: float, limit: Limit) -> float:
+    if tokens is None:
+        return float(limit.capacity)
+    return min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+
+
+def take_tokens(buckets: list[tuple[float | None, float, Limit]], now: float):
+    """
+    All-or-nothing token bucket step over (tokens, updated, limit) buckets.
+    Returns (tokens left per bucket, seconds to wait; 0 when allowed); a
+    request refused by one bucket takes nothing from the others.
+    """
+    refilled = [refill(tokens, updated, now, limit) for tokens, updated, limit in buckets]
+    wait = max(
+        (
+            (1 - tokens) / limit.refill_per_second
+            for tokens, (_, _, limit) in zip(refilled, buckets)
+            if tokens < 1
+        ),
+        default=0.0,
+    )
+    if wait:
+        return refilled, wait
+    return [tokens - 1 for tokens in refilled], 0.0
+
+
+# =======================
+# STORES
+# =======================
+# hit([(key, limit), ...]) checks every bucket and consumes one token from
+# each only if all of them allow the request, atomically. Returns the
+# seconds the caller has to wait (0.0 when the request is allowed).
+
+class MemoryRateLimitStore:
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, hits: list[tuple[str, Limit]]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            buckets = [(*self._buckets.get(key, (None, now)), limit) for key, limit in hits]
+            tokens, wait = take_tokens(buckets, now)
+            for (key, _), left in zip(hits, tokens):
+                self._buckets[key] = (left, now)
+                self._buckets.move_to_end(key)
+            # the least recently used bucket is also the fullest one
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class SqliteRateLimitStore:
+    name = "sqlite"
+    blocking = True     # called through a worker thread
+
+    def __init__(self, path: str, prune_every: int = 1000, idle_seconds: float = 86400):
+        self.path = path
+        self.prune_every = prune_every
+        self.idle_seconds = idle_seconds
+        self._local = threading.local()
+        self._hits = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def hit(self, hits: list[tuple[str, Limit]]) -> float:
+        conn = self._conn()
+        now = time.time()   # wall clock: shared between processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            buckets = []
+            for key, limit in hits:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                buckets.append((row[0] if row else None, row[1] if row else now, limit))
+            tokens, wait = take_tokens(buckets, now)
+            conn.executemany(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                [(key, left, now) for (key, _), left in zip(hits, tokens)],
+            )
+            self._hits += 1
+            if self._hits % self.prune_every == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.idle_seconds,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM buckets").fetchone()[0]
+
+
+def make_store(name: str = RATE_LIMIT_STORE):
+    if name == "memory":
+        return MemoryRateLimitStore(RATE_LIMIT_MAX_KEYS)
+    if name == "sqlite":
+        return SqliteRateLimitStore(RATE_LIMIT_SQLITE_PATH)
+    raise ValueError(f"Unknown RATE_LIMIT_STORE: {name}")
+
+
+# =======================
+# LIMITER
+# =======================
+
+class RateLimiter:
+    def __init__(self, store=None):
+        self._store = store
+        self.rules: dict[str, RateLimitRule] = {}
+        self._limits: dict[str, tuple[Limit | None, Limit | None]] = {}
+        self._lock = threading.Lock()
+        self.allowed: dict[str, int] = {}
+        self.limited: dict[str, int] = {}
+
+    @property
+    def store(self):
+        # created on first use so importing the module never touches disk
+        if self._store is None:
+            self._store = make_store()
+        return self._store
+
+    def configure(self, rules: list[RateLimitRule]):
+        for rule in rules:
+            self.rules[rule.path] = rule
+            self._limits[rule.path] = (
+                Limit.parse(rule.per_ip) if rule.per_ip else None,
+                Limit.parse(rule.per_identifier) if rule.per_identifier else None,
+            )
+            self.allowed.setdefault(rule.path, 0)
+            self.limited.setdefault(rule.path, 0)
+
+    def match(self, path: str, method: str) -> RateLimitRule | None:
+        rule = self.rules.get(path)
+        if rule is not None and method in rule.methods:
+            return rule
+        return None
+
+    async def check(self, rule: RateLimitRule, ip: str | None, identifier: str | None) -> float:
+        """Seconds to wait before retrying, 0.0 when the request may proceed."""
+        ip_limit, identifier_limit = self._limits[rule.path]
+        hits = []
+        if ip_limit and ip:
+            hits.append((f"{rule.path}|ip|{ip}", ip_limit))
+        if identifier_limit and identifier:
+            hits.append((f"{rule.path}|id|{identifier}", identifier_limit))
+
+        # one store call, so the IP bucket is never debited for a request
+        # the identifier bucket turns away (and vice versa)
+        wait = 0.0
+        if hits:
+            if self.store.blocking:
+                wait = await asyncio.to_thread(self.store.hit, hits)
+            else:
+                wait = self.store.hit(hits)
+
+        with self._lock:
+            if wait:
+                self.limited[rule.path] += 1
+            else:
+                self.allowed[rule.path] += 1
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": RATE_LIMIT_ENABLED,
+                "store": self.store.name,
+                "keys": self.store.size(),
+                "rules": {
+                    path: {
+                        "per_ip": rule.per_ip,
+                        "per_identifier": rule.per_identifier,
+                        "identifier": rule.identifier,
+                        "allowed": self.allowed[path],
+                        "limited": self.limited[path],
+                    }
+                    for path, rule in self.rules.items()
+                },
+            }
+
+
+rate_limiter = RateLimiter()
+
+
+# =======================
+# MIDDLEWARE
+# =======================
+
+def _client_ip(scope) -> str | None:
+    if RATE_LIMIT_TRUST_PROXY:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _header(scope, wanted: bytes) -> bytes:
+    for name, value in scope.get("headers", []):
+        if name == wanted:
+            return value
+    return b""
+
+
+async def _buffer_body(receive):
+    """Read the request body (up to MAX_FORM_BYTES) and keep the messages for replay."""
+    messages = []
+    body = b""
+    more = True
+    while more and len(body) <= MAX_FORM_BYTES:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            return None, messages
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return (None if more else body), messages
+
+
+async def _form_field(scope, body: bytes, field: str) -> str | None:
+    """One text field of an urlencoded or multipart body, parsed like the route will."""
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    try:
+        form = await Request(scope, receive).form()
+    except Exception:
+        return None
+    try:
+        value = form.get(field)
+    finally:
+        await form.close()
+    return value if isinstance(value, str) else None
+
+
+def _replay(messages, receive):
+    async def replay_receive():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+    return replay_receive
+
+
+class RateLimitMiddleware:
+    """Pure ASGI so the form body can be peeked at and handed on untouched."""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter, enabled: bool = RATE_LIMIT_ENABLED):
+        self.app = app
+        self.limiter = limiter
+        self.enabled = enabled
+
+    async def _identifier(self, rule: RateLimitRule, scope, receive):
+        if not rule.identifier:
+            return None, receive
+
+        source, field = rule.identifier.split(":", 1)
+        if source == "query":
+            values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(field)
+        elif source == "form":
+            content_type = _header(scope, b"content-type")
+            if not content_type.startswith(FORM_CONTENT_TYPES):
+                return None, receive
+            body, messages = await _buffer_body(receive)
+            receive = _replay(messages, receive)
+            value = await _form_field(scope, body, field) if body else None
+            values = [value] if value else None
+        else:
+            raise ValueError(f"Unknown identifier source: {source}")
+
+        return (values[0].strip().lower() if values else None), receive
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.limiter.match(scope["path"], scope["method"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        identifier, receive = await self._identifier(rule, scope, receive)
+        if rule.identifier and not identifier:
+            response = JSONResponse(
+                {"detail": f"Missing or unreadable {rule.identifier.split(':', 1)[1]}"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        wait = await self.limiter.check(rule, _client_ip(scope), identifier)
+
+        if wait:
+            response = JSONResponse(
+                {"detail": "Too many requests, please slow down"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,144 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, insert, literal, false, LargeBinary, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.refresh_token import RefreshToken
+from app.core.security import (
+    create_refresh_token,
+    verify_refresh_token,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+)
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _new_token(user_id: int) -> str:
+    # jti keeps two tokens issued in the same second distinct
+    return create_refresh_token({"sub": str(user_id), "jti": uuid.uuid4().hex})
+
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def issue_refresh_token(db, user_id: int) -> str:
+    """
+    Start a new token family (one per login). Works with both Session and
+    AsyncSession; the caller commits.
+    """
+    token = _new_token(user_id)
+    db.add(
+        RefreshToken(
+            token_digest=token_digest(token),
+            family_id=uuid.uuid4().hex,
+            user_id=user_id,
+            expires_at=_expiry(),
+        )
+    )
+    return token
+
+
+def _revoke_family_stmt(user_id: int, family_id: str):
+    return (
+        update(RefreshToken)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked == False,
+        )
+        .values(revoked=True)
+    )
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[int, str]:
+    """
+    One indexed lookup + one write. Returns (user_id, new refresh token);
+    the old token is revoked and the new one joins its family.
+    """
+    verify_refresh_token(token)
+
+    entry = (
+        await db.execute(
+            select(
+                RefreshToken.id,
+                RefreshToken.user_id,
+                RefreshToken.family_id,
+                RefreshToken.revoked,
+                RefreshToken.expires_at,
+            ).where(RefreshToken.token_digest == token_digest(token))
+        )
+    ).first()
+
+    if entry is None or entry.expires_at <= datetime.utcnow():
+        raise _unauthorized("Refresh token not found or revoked")
+
+    if entry.revoked:
+        # a rotated-out token came back: assume it leaked, kill the family
+        await db.execute(_revoke_family_stmt(entry.user_id, entry.family_id))
+        await db.commit()
+        raise _unauthorized("Refresh token reuse detected")
+
+    new_token = _new_token(entry.user_id)
+
+    # WITH rotated AS (UPDATE ... SET revoked = true ... RETURNING ...)
+    # INSERT INTO refresh_tokens SELECT ... FROM rotated
+    rotated = (
+        update(RefreshToken)
+        .where(RefreshToken.id == entry.id, RefreshToken.revoked == False)
+        .values(revoked=True)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .cte("rotated")
+    )
+    stmt = (
+        insert(RefreshToken)
+        .from_select(
+            ["token_digest", "family_id", "user_id", "expires_at", "revoked", "created_at"],
+            select(
+                literal(token_digest(new_token), LargeBinary),
+                rotated.c.family_id,
+                rotated.c.user_id,
+                literal(_expiry(), DateTime),
+                false(),
+                literal(datetime.utcnow(), DateTime),
+            ),
+        )
+        .add_cte(rotated)
+        .returning(RefreshToken.id)
+    )
+
+    if (await db.execute(stmt)).first() is None:
+        # lost a race with another rotation of the same token
+        await db.execute(_revoke_family_stmt(entry.user_id, entry.family_id))
+        await db.commit()
+        raise _unauthorized("Refresh token reuse detected")
+
+    await db.commit()
+    return entry.user_id, new_token
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> bool:
+    """Logout: revokes the token's whole family. False if unknown."""
+    entry = (
+        await db.execute(
+            select(RefreshToken.user_id, RefreshToken.family_id).where(
+                RefreshToken.token_digest == token_digest(token)
+            )
+        )
+    ).first()
+
+    if entry is None:
+        return False
+
+    await db.execute(_revoke_family_stmt(entry.user_id, entry.family_id))
+    await db.commit()
+    return True
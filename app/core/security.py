@@ -1,14 +1,22 @@
+import hashlib
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
+from jose import JWTError
 from jose.exceptions import ExpiredSignatureError
 from passlib.context import CryptContext
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
+from app.core.cache import TTLCache
+from app.core.hashing import hashing_pool
+from app.core.jwt_backend import jwt_backend
 import os
 
 # =======================
@@ -22,6 +30,17 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Verified access token claims by token digest, each kept until the token's
+# own exp; an access token is typically presented hundreds of times.
+ACCESS_CLAIMS_CACHE_SIZE = int(os.getenv("ACCESS_CLAIMS_CACHE_SIZE", "10000"))
+
+# =======================
+# PRINCIPAL CACHE CONFIG
+# =======================
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))  # seconds
+
 # =======================
 # PASSWORD CONFIG
 # =======================
@@ -29,15 +48,42 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def hash_password(password: str) -> str:
+def _bcrypt_hash_password(password: str) -> str:
     # bcrypt max length safety
     return pwd_context.hash(password[:72])
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _bcrypt_verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password[:72], hashed_password)
 
 
+# All bcrypt work goes through the dedicated hashing pool (app/core/hashing.py),
+# which answers 503 instead of queueing forever when it is saturated.
+
+def hash_password(password: str) -> str:
+    return hashing_pool.run(_bcrypt_hash_password, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return hashing_pool.run(_bcrypt_verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run_async(_bcrypt_hash_password, password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    return await hashing_pool.map_async(
+        _bcrypt_hash_password, [(p,) for p in passwords]
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run_async(
+        _bcrypt_verify_password, plain_password, hashed_password
+    )
+
+
 # =======================
 # TOKEN CREATION
 # =======================
@@ -53,7 +99,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     )
     to_encode.update({"exp": expire})
 
-    return jwt.encode(to_encode, ACCESS_SECRET_KEY, algorithm=ALGORITHM)
+    return jwt_backend.encode(to_encode, ACCESS_SECRET_KEY)
 
 
 def create_refresh_token(data: dict):
@@ -70,7 +116,7 @@ def create_refresh_token(data: dict):
         }
     )
 
-    return jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+    return jwt_backend.encode(to_encode, REFRESH_SECRET_KEY)
 
 
 # =======================
@@ -79,7 +125,7 @@ def create_refresh_token(data: dict):
 
 def verify_refresh_token(token: str):
     try:
-        payload = jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt_backend.decode(token, REFRESH_SECRET_KEY)
 
         if payload.get("type") != "refresh":
             raise HTTPException(
@@ -108,13 +154,34 @@ def verify_refresh_token(token: str):
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
+access_claims_cache = TTLCache(
+    maxsize=ACCESS_CLAIMS_CACHE_SIZE,
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
+
+def _decode_access_token(token: str) -> dict:
+    # Only successfully verified claims are cached, so a hit is as good as a
+    # fresh decode as long as exp still holds. Callers must not mutate it.
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = access_claims_cache.get(digest)
+    if claims is not None:
+        if "exp" not in claims or claims["exp"] >= int(time.time()):
+            return claims
+        access_claims_cache.invalidate(digest)
+
+    claims = jwt_backend.decode(token, ACCESS_SECRET_KEY)
+
+    if "exp" not in claims:
+        access_claims_cache.set(digest, claims)
+    elif claims["exp"] > time.time():
+        access_claims_cache.set(digest, claims, ttl=claims["exp"] - time.time())
+    return claims
+
+
+def _user_id_from_access_token(token: str) -> int:
     try:
-        payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_access_token(token)
         user_id: str | None = payload.get("sub")
 
         if user_id is None:
@@ -135,7 +202,59 @@ def get_current_user(
             detail="Invalid access token",
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return int(user_id)
+
+
+# Slim view of the authenticated user, cached per user id so that
+# authenticated routes don't pay a users lookup on every request.
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    role: str
+    email: str | None
+
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate(user_id)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    user_id = _user_id_from_access_token(token)
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    result = await db.execute(
+        select(User.id, User.role, User.email).where(User.id == user_id)
+    )
+    row = result.first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+
+    principal = Principal(id=row.id, role=row.role or "user", email=row.email)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+# Blocking variant, kept for the /sync compat routes (benchmarking)
+def get_current_user_sync(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    user_id = _user_id_from_access_token(token)
+
+    user = db.query(User).filter(User.id == user_id).first()
 
     if user is None:
         raise HTTPException(
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import inspect, text
+
+from app.core import migrations
+from app.database import Base, engine, async_engine
+from app.models import habit, user, refresh_token, data_version, otp_code, outbound_email  # noqa: F401
+
+# =======================
+# STARTUP CONFIG
+# =======================
+# The ASGI startup hook only schedules the pipeline, so the process starts
+# serving /healthz immediately; /readyz turns 200 once every phase is done.
+#
+# STARTUP_SCHEMA_MODE:
+#   verify  compare Base.metadata against the live database, never write
+#   create  bootstrap first (app/core/migrations.py), then verify; the
+#           Docker image's default
+#   off     skip the schema phase
+#
+# verify never creates anything, so with it a database needs bootstrapping
+# once per new table, e.g. by a one-off job or init container running
+# `python -m app.core.startup create-schema`. Drift stops the pipeline and
+# /readyz stays 503 until the schema is fixed and the process restarted.
+
+STARTUP_SCHEMA_MODE = os.getenv("STARTUP_SCHEMA_MODE", "verify")
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "2"))       # per engine
+STARTUP_DB_ATTEMPT_TIMEOUT = float(os.getenv("STARTUP_DB_ATTEMPT_TIMEOUT", "5"))
+STARTUP_RETRY_MAX_DELAY = float(os.getenv("STARTUP_RETRY_MAX_DELAY", "10"))
+READYZ_DB_TIMEOUT = float(os.getenv("READYZ_DB_TIMEOUT", "2"))
+
+PHASES = ("database", "schema", "pool_warmup", "background_tasks")
+
+
+class SchemaDrift(Exception):
+    """The database is missing tables, columns, indexes or extensions the models expect."""
+
+    def __init__(self, drift: dict):
+        self.drift = drift
+        super().__init__(
+            f"schema drift: {drift}; run `python -m app.core.startup create-schema` or migrate"
+        )
+
+
+def schema_drift(sync_conn) -> dict:
+    """Tables, columns, indexes and extensions the models need that the database lacks."""
+    inspector = inspect(sync_conn)
+    existing = set(inspector.get_table_names())
+    missing_tables = []
+    missing_columns = {}
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            missing_tables.append(table.name)
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        missing = [c.name for c in table.columns if c.name not in columns]
+        if missing:
+            missing_columns[table.name] = missing
+
+    drift = {
+        "missing_tables": missing_tables,
+        "missing_columns": missing_columns,
+        "missing_indexes": migrations.missing_indexes(sync_conn),
+        "missing_extensions": migrations.missing_extensions(sync_conn),
+    }
+    return drift if any(drift.values()) else {}
+
+
+async def ping_database(timeout: float) -> None:
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(ping(), timeout)
+
+
+class StartupPipeline:
+    def __init__(self):
+        self._on_ready = []
+        self._task: asyncio.Task | None = None
+        self.ready = False
+        self.runs = 0
+        self.total_ms: float | None = None
+        self.phases = {}
+        self._reset()
+
+    def _reset(self):
+        self.phases = {
+            name: {"status": "pending", "ms": None, "error": None}
+            for name in PHASES
+        }
+
+    def on_ready(self, callback):
+        """Run `callback()` (sync) once the database is usable, e.g. to start workers."""
+        self._on_ready.append(callback)
+
+    # -------- phases --------
+
+    async def _database(self):
+        delay = 0.5
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                await ping_database(STARTUP_DB_ATTEMPT_TIMEOUT)
+                return {"attempts": attempts}
+            except Exception as e:
+                self.phases["database"]["error"] = repr(e)
+                print(f"⏳ Waiting for database (attempt {attempts}): {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+
+    async def _schema(self):
+        if STARTUP_SCHEMA_MODE == "off":
+            return {"mode": "off"}
+
+        if STARTUP_SCHEMA_MODE == "create":
+            async with async_engine.begin() as conn:
+                await conn.run_sync(migrations.bootstrap)
+
+        async with async_engine.connect() as conn:
+            drift = await conn.run_sync(schema_drift)
+        if drift:
+            raise SchemaDrift(drift)
+        return {"mode": STARTUP_SCHEMA_MODE, "tables": len(Base.metadata.tables)}
+
+    async def _pool_warmup(self):
+        if DB_WARM_CONNECTIONS <= 0:
+            return {"connections": 0}
+
+        async def warm_async():
+            conn = await async_engine.connect()
+            await conn.execute(text("SELECT 1"))
+            return conn
+
+        connections = await asyncio.gather(*(warm_async() for _ in range(DB_WARM_CONNECTIONS)))
+        for conn in connections:
+            await conn.close()   # back into the pool, still open
+
+        def warm_sync():
+            held = [engine.connect() for _ in range(DB_WARM_CONNECTIONS)]
+            for conn in held:
+                conn.close()
+
+        await asyncio.to_thread(warm_sync)
+        return {"connections": DB_WARM_CONNECTIONS}
+
+    async def _background_tasks(self):
+        for callback in self._on_ready:
+            callback()
+        return {"started": len(self._on_ready)}
+
+    # -------- runner --------
+
+    async def _phase(self, name: str, fn):
+        phase = self.phases[name]
+        phase["status"] = "running"
+        started = time.perf_counter()
+        try:
+            detail = await fn()
+        except Exception as e:
+            phase.update(
+                status="failed",
+                ms=round((time.perf_counter() - started) * 1000, 2),
+                error=e.drift if isinstance(e, SchemaDrift) else repr(e),
+            )
+            print(f"❌ Startup phase {name} failed after {phase['ms']} ms: {e!r}")
+            raise
+        phase.update(
+            status="ok",
+            ms=round((time.perf_counter() - started) * 1000, 2),
+            error=None,
+            **(detail or {}),
+        )
+        print(f"✅ Startup phase {name}: {phase['ms']} ms")
+
+    async def run(self):
+        delay = 1.0
+        while True:
+            self.runs += 1
+            self._reset()
+            started = time.perf_counter()
+            try:
+                await self._phase("database", self._database)
+                await self._phase("schema", self._schema)
+                await self._phase("pool_warmup", self._pool_warmup)
+                await self._phase("background_tasks", self._background_tasks)
+            except SchemaDrift:
+                # needs a migration or a deploy, retrying won't help
+                return
+            except Exception:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+                continue
+
+            self.total_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.ready = True
+            print(f"✅ Ready in {self.total_ms} ms")
+            return
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "runs": self.runs,
+            "total_ms": self.total_ms,
+            "schema_mode": STARTUP_SCHEMA_MODE,
+            "phases": {name: dict(phase) for name, phase in self.phases.items()},
+        }
+
+
+startup_pipeline = StartupPipeline()
+
+
+if __name__ == "__main__":
+    # python -m app.core.startup check|create-schema
+    parser = argparse.ArgumentParser(description="Database schema check / bootstrap")
+    parser.add_argument("command", choices=["check", "create-schema"])
+    args = parser.parse_args()
+
+    if args.command == "create-schema":
+        with engine.begin() as conn:
+            migrations.bootstrap(conn)
+
+    with engine.connect() as conn:
+        drift = schema_drift(conn)
+    if drift:
+        print(f"❌ Schema drift: {drift}")
+        raise SystemExit(1)
+    print("✅ Schema matches the models")
@@ -1,17 +1,53 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.db_pool import (
+    pool_settings,
+    instrument_engine,
+    TimedQueuePool,
+    TimedAsyncAdaptedQueuePool,
+)
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql://postgres:postgres@db:5432/task_manager",
 )
 
+
+def _to_async_url(url: str) -> str:
+    # postgresql://... -> postgresql+asyncpg://...
+    if url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url[len("postgresql+psycopg2://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(DATABASE_URL))
+
+
+def _pool_kwargs(url: str, poolclass) -> dict:
+    # SQLite (dev) keeps SQLAlchemy's default pool
+    if url.startswith("sqlite"):
+        return {}
+    return {"poolclass": poolclass, **pool_settings()}
+
+
+# =========================
+# SYNC ENGINE (compat path)
+# =========================
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,   # prevents stale connections
     echo=False,           # set True for SQL debugging
+    **_pool_kwargs(DATABASE_URL, TimedQueuePool),
 )
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -19,8 +55,41 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+# =========================
+# ASYNC ENGINE
+# =========================
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    echo=False,
+    **_pool_kwargs(ASYNC_DATABASE_URL, TimedAsyncAdaptedQueuePool),
+)
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # objects stay usable after commit without a reload
+)
+
 Base = declarative_base()
 
+# Postgres caps a single statement at 32767 bind parameters; size
+# multi-row INSERTs by the table's column count to stay under it.
+PG_MAX_BIND_PARAMS = 32767
+
+
+def upsert(table):
+    """
+    INSERT construct with ON CONFLICT support for the configured backend:
+    Postgres, or SQLite for local development. Name conflict targets with
+    index_elements; constraint= only exists on Postgres.
+    """
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
 
 def get_db():
     db = SessionLocal()
@@ -28,3 +97,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,16 +1,21 @@
-import time
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
-from app.models import habit, user, refresh_token
+from app.models import habit, user, refresh_token, data_version, otp_code, outbound_email
 
-from app.core.firebase import init_firebase
+from app.core.startup import startup_pipeline
+from app.core.rate_limit import RateLimitMiddleware, RateLimitRule, rate_limiter
 from app.routes.user import router as user_router
 from app.routes.habit import router as habit_router
 from app.routes.auth_email import router as email_auth_router
 from app.routes.auth_phone import router as auth_phone_router
 from app.routes.auth_google import router as google_auth_router
+from app.routes.admin import router as admin_router
+from app.routes.health import router as health_router
+from app.routes.sync_compat import router as sync_compat_router
+from app.services.janitor import janitor, JANITOR_ENABLED
+from app.services.mail_queue import mail_queue, MAIL_QUEUE_ENABLED
 
 
 app = FastAPI(
@@ -18,21 +23,53 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Startup only schedules the pipeline (app/core/startup.py): the process
+# serves /healthz right away and /readyz once the database is usable.
+# Firebase is initialised on first use (app/core/firebase.py).
+if JANITOR_ENABLED:
+    startup_pipeline.on_ready(janitor.start)
+if MAIL_QUEUE_ENABLED:
+    startup_pipeline.on_ready(mail_queue.start)
+
+
 @app.on_event("startup")
-def startup_event():
-    init_firebase()
-
-    retries = 10
-    while retries:
-        try:
-            # TEMP: OK for now, later replaced by Alembic
-            Base.metadata.create_all(bind=engine)
-            print("✅ Database connected")
-            break
-        except Exception:
-            print("⏳ Waiting for database...")
-            retries -= 1
-            time.sleep(2)
+async def startup_event():
+    # fail the boot here, not in a background task, if mail isn't configured
+    if MAIL_QUEUE_ENABLED:
+        mail_queue.configure()
+    startup_pipeline.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await startup_pipeline.stop()
+    await janitor.stop()
+    await mail_queue.stop()
+
+
+# Per client limits on the auth endpoints that burn bcrypt or send mail.
+# Added before CORS so 429s still carry CORS headers.
+rate_limiter.configure([
+    RateLimitRule(
+        "/users/login",
+        per_ip="20/minute",
+        per_identifier="5/minute",
+        identifier="form:username",
+    ),
+    RateLimitRule(
+        "/auth/email/send-otp",
+        per_ip="10/minute",
+        per_identifier="10/hour",
+        identifier="query:email",
+    ),
+    RateLimitRule(
+        "/auth/email/verify-otp",
+        per_ip="30/minute",
+        per_identifier="10/minute",
+        identifier="query:email",
+    ),
+])
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,11 +83,25 @@ app.add_middleware(
 )
 
 # Routers
+app.include_router(health_router)
 app.include_router(user_router)
 app.include_router(habit_router)
 app.include_router(email_auth_router)
 app.include_router(auth_phone_router)
 app.include_router(google_auth_router)
+app.include_router(admin_router)
+
+# Old blocking versions of the hot routes, for side by side benchmarks
+if os.getenv("ENABLE_SYNC_ROUTES", "0") == "1":
+    app.include_router(sync_compat_router)
+    rate_limiter.configure([
+        RateLimitRule(
+            "/sync/users/login",
+            per_ip="20/minute",
+            per_identifier="5/minute",
+            identifier="form:username",
+        ),
+    ])
 
 @app.get("/")
 def root():
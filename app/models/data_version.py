@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey
+
+from app.database import Base
+
+
+class UserDataVersion(Base):
+    __tablename__ = "user_data_versions"
+
+    # Bumped on every habit / habit log write; habit reads derive their
+    # ETag from it (app/services/data_version.py)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    version = Column(BigInteger, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, Boolean, LargeBinary, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -46,3 +46,73 @@ class HabitLog(Base):
         UniqueConstraint("user_id","habit_id", "date", name="unique_habit_day"),
         Index("idx_habit_month","user_id", "habit_id", "date"),
     )
+
+
+class HabitStreak(Base):
+    __tablename__ = "habit_streaks"
+
+    # Maintained incrementally by app/services/streaks.py on every log write.
+    # current_streak is the length of the run ending at last_completed_date.
+    habit_id = Column(
+        Integer,
+        ForeignKey("habits.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_completed_date = Column(Date, nullable=True)
+
+
+class HabitMonthStat(Base):
+    __tablename__ = "habit_month_stats"
+
+    # Rollup of habit_logs per habit and calendar month, refreshed in the
+    # same transaction as every log write (app/services/rollups.py).
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    habit_id = Column(
+        Integer,
+        ForeignKey("habits.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    year = Column(SmallInteger, primary_key=True)
+    month = Column(SmallInteger, primary_key=True)
+
+    completed_count = Column(Integer, nullable=False, default=0)
+    logged_days = Column(Integer, nullable=False, default=0)
+    sleep_hours_sum = Column(Integer, nullable=False, default=0)
+
+
+class HabitYearBits(Base):
+    __tablename__ = "habit_year_bits"
+
+    # One bit per day of the year (bit n = day-of-year n, LSB first within
+    # each byte, same numbering as Postgres set_bit/get_bit on bytea).
+    # 366 bits -> 46 bytes per habit-year, kept in sync with habit_logs.
+    habit_id = Column(
+        Integer,
+        ForeignKey("habits.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    year = Column(SmallInteger, primary_key=True)
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    bits = Column(LargeBinary(46), nullable=False)
+
+    __table_args__ = (
+        Index("idx_year_bits_user_year", "user_id", "year"),
+    )
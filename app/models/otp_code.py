@@ -12,7 +12,7 @@ class OTPCode(Base):
     # 📧 email OR 📱 phone number
     identifier = Column(String, index=True, nullable=False)
 
-    # 🔐 Hashed OTP (never store plain OTP)
+    # 🔐 Keyed HMAC of the OTP (never store plain OTP)
     otp_hash = Column(String, nullable=False)
 
     # ⏰ Expiry time
@@ -21,6 +21,9 @@ class OTPCode(Base):
     # ✅ Mark OTP as used
     verified = Column(Boolean, default=False)
 
+    # 🚫 Failed verifies for this identifier (see app/core/otp_store.py)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
     # 🕒 Created time
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, JSON
+from datetime import datetime
+
+from app.database import Base
+
+
+class OutboundEmail(Base):
+    __tablename__ = "outbound_emails"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    to_email = Column(String, nullable=False)
+
+    # Rendered by the worker at send time (app/utils/email.py TEMPLATES), so
+    # no finished mail body is ever stored. params can hold a live OTP, so it
+    # is a Fernet token under MAIL_PARAMS_KEY (a JSON string), never the
+    # plain dict, and is cleared as soon as the row is sent (deleted) or
+    # dead-lettered.
+    template = Column(String(32), nullable=False)
+    params = Column(JSON(none_as_null=True), nullable=True)
+
+    # pending -> (deleted once sent) | dead
+    status = Column(String(16), nullable=False, default="pending")
+
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # When a worker may pick the row up; claiming pushes it forward by the
+    # lease so a crashed worker's batch is retried instead of lost
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # OTP mails are useless once the code has expired
+    expires_at = Column(DateTime, nullable=True)
+
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_outbound_emails_status_next", "status", "next_attempt_at"),
+    )
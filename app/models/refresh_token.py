@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, LargeBinary, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -10,13 +10,17 @@ class RefreshToken(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    token = Column(
-        String(512),
+    # SHA-256 of the issued JWT; the token itself is never stored
+    token_digest = Column(
+        LargeBinary(32),
         unique=True,
-        index=True,
         nullable=False
     )
 
+    # All tokens produced by rotating one login share a family; presenting a
+    # rotated-out token again revokes the whole family (reuse detection)
+    family_id = Column(String(32), nullable=False)
+
     user_id = Column(
         Integer,
         ForeignKey("users.id", ondelete="CASCADE"),
@@ -25,7 +29,7 @@ class RefreshToken(Base):
 
     expires_at = Column(DateTime, nullable=False)
 
-    revoked = Column(Boolean, default=False)
+    revoked = Column(Boolean, default=False, nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -33,3 +37,13 @@ class RefreshToken(Base):
         "User",
         back_populates="refresh_tokens"
     )
+
+    __table_args__ = (
+        # only live tokens are ever looked up by family
+        Index(
+            "idx_refresh_tokens_active_family",
+            "user_id",
+            "family_id",
+            postgresql_where=text("NOT revoked"),
+        ),
+    )
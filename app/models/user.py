@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -45,3 +45,20 @@ class User(Base):
         back_populates="user",
         cascade="all, delete"
     )
+
+    __table_args__ = (
+        # substring search (ILIKE '%term%') in GET /users, see user_search.py;
+        # needs pg_trgm, created by app/core/migrations.py
+        Index(
+            "idx_users_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "idx_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine, async_engine, get_db, get_async_db
+from app.core.security import Principal, require_admin, principal_cache, access_claims_cache
+from app.core.db_pool import pool_settings, pool_status, connection_budget
+from app.core.hashing import hashing_pool
+from app.core.otp_store import otp_store
+from app.core.rate_limit import rate_limiter
+from app.core.firebase_tokens import firebase_verifier
+from app.services.janitor import janitor
+from app.services.mail_queue import mail_queue, queue_depth
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+# =========================
+# DB POOL STATS
+# =========================
+@router.get("/db/pool")
+def get_db_pool_stats(
+    workers: int | None = None,
+    admin_user: Principal = Depends(require_admin),
+):
+    budget = connection_budget(workers) if workers else connection_budget()
+
+    return {
+        "settings": pool_settings(),
+        "budget": budget,
+        "pools": {
+            "sync": pool_status(engine),
+            "async": pool_status(async_engine.sync_engine),
+        },
+    }
+
+
+# =========================
+# PRINCIPAL CACHE STATS
+# =========================
+@router.get("/cache/principals")
+def get_principal_cache_stats(
+    admin_user: Principal = Depends(require_admin),
+):
+    return principal_cache.stats()
+
+
+# =========================
+# ACCESS TOKEN CLAIMS CACHE STATS
+# =========================
+@router.get("/cache/access-tokens")
+def get_access_claims_cache_stats(
+    admin_user: Principal = Depends(require_admin),
+):
+    return access_claims_cache.stats()
+
+
+# =========================
+# FIREBASE TOKEN CACHE STATS
+# =========================
+@router.get("/cache/firebase")
+def get_firebase_cache_stats(
+    admin_user: Principal = Depends(require_admin),
+):
+    return firebase_verifier.stats()
+
+
+# =========================
+# HASHING POOL STATS
+# =========================
+@router.get("/hashing")
+def get_hashing_pool_stats(
+    admin_user: Principal = Depends(require_admin),
+):
+    return hashing_pool.stats()
+
+
+# =========================
+# MAINTENANCE (JANITOR)
+# =========================
+@router.get("/maintenance")
+def get_maintenance_stats(
+    admin_user: Principal = Depends(require_admin),
+):
+    return janitor.stats()
+
+
+@router.post("/maintenance/purge")
+async def run_maintenance_purge(
+    admin_user: Principal = Depends(require_admin),
+):
+    result = await janitor.run_once()
+    return {**result, "stats": janitor.stats()}
+
+
+# =========================
+# OUTBOUND MAIL QUEUE
+# =========================
+@router.get("/mail")
+async def get_mail_queue_stats(
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: Principal = Depends(require_admin),
+):
+    return {**mail_queue.stats(), "queue": await queue_depth(db)}
+
+
+
+# =========================
+# OTP STORE STATS
+# =========================
+@router.get("/otp")
+def get_otp_store_stats(
+    db: Session = Depends(get_db),
+    admin_user: Principal = Depends(require_admin),
+):
+    return otp_store.stats(db)
+
+
+# =========================
+# RATE LIMITS
+# =========================
+@router.get("/rate-limits")
+def get_rate_limit_stats(
+    admin_user: Principal = Depends(require_admin),
+):
+    return rate_limiter.stats()
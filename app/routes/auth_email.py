@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import datetime
 
 from app.database import get_db
-from app.models.otp_code import OTPCode
 from app.models.user import User
+from app.services import user_search
 from app.schemas.user import TokenResponse
-from app.core.security import create_access_token, create_refresh_token
+from app.core.security import create_access_token
+from app.core.refresh_tokens import issue_refresh_token
+from app.core.otp_store import otp_store
 
-from app.utils.email import send_otp_email
-from app.utils.otp import generate_otp, hash_otp, verify_otp
+from app.services.mail_queue import enqueue_email, mail_queue
+from app.utils.otp import generate_otp
 
 router = APIRouter(prefix="/auth/email", tags=["Auth - Email OTP"])
 
@@ -20,17 +21,12 @@ router = APIRouter(prefix="/auth/email", tags=["Auth - Email OTP"])
 @router.post("/send-otp")
 def send_email_otp_route(email: str, db: Session = Depends(get_db)):
     otp = generate_otp()
+    expires_at = otp_store.issue(db, email, otp)
 
-    otp_entry = OTPCode(
-        identifier=email,
-        otp_hash=hash_otp(otp),
-        expires_at=OTPCode.expiry_time(),
-    )
-
-    db.add(otp_entry)
+    # rendered and delivered by the mail queue workers
+    enqueue_email(db, email, "otp", {"otp": otp}, expires_at=expires_at)
     db.commit()
-
-    send_otp_email(email, otp)
+    mail_queue.notify()
 
     return {"message": "OTP sent to email"}
 
@@ -44,25 +40,12 @@ def verify_email_otp_route(
     otp: str,
     db: Session = Depends(get_db),
 ):
-    otp_entry = (
-        db.query(OTPCode)
-        .filter(
-            OTPCode.identifier == email,
-            OTPCode.verified == False,
-            OTPCode.expires_at > datetime.utcnow(),
-        )
-        .order_by(OTPCode.created_at.desc())
-        .first()
-    )
-
-    if not otp_entry or not verify_otp(otp, otp_entry.otp_hash):
+    if not otp_store.verify(db, email, otp):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired OTP",
         )
 
-    otp_entry.verified = True
-
     user = db.query(User).filter(User.email == email).first()
 
     if not user:
@@ -75,12 +58,13 @@ def verify_email_otp_route(
         db.add(user)
 
     user.email_verified = True
-    db.commit()
-    db.refresh(user)
+    db.flush()  # assigns user.id for a new user
 
     # ✅ FIXED: always store user.id in JWT
     access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    refresh_token = issue_refresh_token(db, user.id)
+    user_search.user_saved(user.id, user.name, user.email)
+    db.commit()
 
     return {
         "access_token": access_token,
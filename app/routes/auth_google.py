@@ -1,17 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from firebase_admin import auth as firebase_auth
 from pydantic import BaseModel
-from datetime import datetime, timedelta
 
 from app.database import get_db
 from app.models.user import User
-from app.models.refresh_token import RefreshToken
-from app.core.security import (
-    create_access_token,
-    create_refresh_token,
-    REFRESH_TOKEN_EXPIRE_DAYS,
-)
+from app.services import user_search
+from app.core.security import create_access_token
+from app.core.refresh_tokens import issue_refresh_token
+from app.core.firebase_tokens import FirebaseTokenVerifier, get_firebase_verifier
 
 router = APIRouter(prefix="/auth", tags=["Auth - Google"])
 
@@ -24,11 +20,10 @@ class GoogleAuthRequest(BaseModel):
 def google_auth(
     payload: GoogleAuthRequest,
     db: Session = Depends(get_db),
+    verifier: FirebaseTokenVerifier = Depends(get_firebase_verifier),
 ):
     try:
-        decoded_token = firebase_auth.verify_id_token(
-            payload.firebase_token
-        )
+        decoded_token = verifier.verify(payload.firebase_token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,7 +41,8 @@ def google_auth(
 
     user = db.query(User).filter(User.email == email).first()
 
-    if not user:
+    created = user is None
+    if created:
         user = User(
             name=name,
             email=email,
@@ -54,22 +50,14 @@ def google_auth(
             role="user",
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
 
     # ✅ FIXED: use user.id in JWT
     access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
-
-    db_refresh = RefreshToken(
-        token=refresh_token,
-        user_id=user.id,
-        expires_at=datetime.utcnow()
-        + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
-    )
-
-    db.add(db_refresh)
+    refresh_token = issue_refresh_token(db, user.id)
     db.commit()
+    if created:
+        user_search.user_saved(user.id, user.name, user.email)
 
     return {
         "access_token": access_token,
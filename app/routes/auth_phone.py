@@ -3,10 +3,11 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User
+from app.services import user_search
 from app.schemas.user import TokenResponse
-from app.core.security import create_access_token, create_refresh_token
-
-from firebase_admin import auth as firebase_auth
+from app.core.security import create_access_token
+from app.core.refresh_tokens import issue_refresh_token
+from app.core.firebase_tokens import FirebaseTokenVerifier, get_firebase_verifier
 
 router = APIRouter(prefix="/auth/phone", tags=["Auth - Phone OTP"])
 
@@ -15,9 +16,10 @@ router = APIRouter(prefix="/auth/phone", tags=["Auth - Phone OTP"])
 def verify_phone_otp(
     firebase_token: str,
     db: Session = Depends(get_db),
+    verifier: FirebaseTokenVerifier = Depends(get_firebase_verifier),
 ):
     try:
-        decoded = firebase_auth.verify_id_token(firebase_token)
+        decoded = verifier.verify(firebase_token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,12 +46,13 @@ def verify_phone_otp(
         db.add(user)
 
     user.phone_verified = True
-    db.commit()
-    db.refresh(user)
+    db.flush()
 
     # ✅ FIXED: always use user.id in JWT
     access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    refresh_token = issue_refresh_token(db, user.id)
+    db.commit()
+    user_search.user_saved(user.id, user.name, user.email)
 
     return {
         "access_token": access_token,
@@ -1,13 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select, func, literal, true, not_, Date, Integer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
-from typing import List, Optional
+from typing import List, Optional, Literal
+from typing_extensions import TypedDict
 
-from app.database import get_db
+from app.database import get_db, get_async_db, upsert
 from app.models.habit import Habit, HabitLog
-from app.core.security import get_current_user
-from app.models.user import User
-from pydantic import BaseModel
+from app.core.security import get_current_user, Principal
+from app.services.habit_import import import_habit_logs, HabitImportError
+from app.services.habit_export import export_habits
+from app.utils.fast_json import FAST_JSON_RESPONSES, rows_response
+from app.services import (
+    streaks,
+    rollups,
+    log_hooks,
+    bitsets,
+    habit_stats,
+    calendar_format,
+    data_version,
+)
+from pydantic import BaseModel, TypeAdapter
 
 
 router = APIRouter(prefix="/habits", tags=["Habits"])
@@ -35,11 +50,100 @@ class HabitLogResponse(BaseModel):
     sleep_hours: Optional[int] = None
 
 
+# Plain-dict row shapes for the fast read path (app/utils/fast_json.py)
+class HabitRow(TypedDict):
+    id: int
+    name: str
+
+
+class HabitLogRow(TypedDict):
+    habit_id: int
+    date: date
+    completed: bool
+    sleep_hours: Optional[int]
+
+
+_habit_rows = TypeAdapter(List[HabitRow])
+_habit_log_rows = TypeAdapter(List[HabitLogRow])
+
+
 class HabitToggle(BaseModel):
     date: Optional[date] = None
     sleep_hours: Optional[int] = None
 
 
+class BatchHabitCreate(BaseModel):
+    ref: str            # client-side id, entries can point at it via habit_ref
+    name: str
+
+
+class BatchLogEntry(BaseModel):
+    habit_id: Optional[int] = None
+    habit_ref: Optional[str] = None
+    date: date
+    completed: bool = True
+    sleep_hours: Optional[int] = None
+
+
+class HabitStreakResponse(BaseModel):
+    habit_id: int
+    name: str
+    current_streak: int
+    longest_streak: int
+    last_completed_date: Optional[date] = None
+
+
+class MonthStat(BaseModel):
+    year: int
+    month: int
+    completed: int
+    logged_days: int
+    sleep_hours_sum: int
+    completion_rate: float
+
+
+class HabitMonthlyStats(BaseModel):
+    habit_id: int
+    name: str
+    months: List[MonthStat]
+
+
+class HabitYearStats(BaseModel):
+    habit_id: int
+    completed_days: int
+    completion_rate: float
+    last_7_days_rate: float
+    last_30_days_rate: float
+    longest_streak: int
+    current_streak: int
+
+
+class HabitBatchRequest(BaseModel):
+    habits: List[BatchHabitCreate] = []
+    entries: List[BatchLogEntry] = []
+
+
+class BatchHabitResult(BaseModel):
+    ref: str
+    id: int
+    name: str
+
+
+class BatchEntryResult(BaseModel):
+    index: int
+    habit_id: Optional[int] = None
+    date: date
+    # applied | not_found | forbidden | unknown_ref
+    status: str
+    completed: Optional[bool] = None
+    sleep_hours: Optional[int] = None
+
+
+class HabitBatchResponse(BaseModel):
+    habits: List[BatchHabitResult]
+    entries: List[BatchEntryResult]
+
+
 # =========================
 # CREATE HABIT
 # =========================
@@ -47,7 +151,7 @@ class HabitToggle(BaseModel):
 def create_habit(
     habit: HabitCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     new_habit = Habit(
         name=habit.name,
@@ -55,6 +159,7 @@ def create_habit(
     )
 
     db.add(new_habit)
+    db.execute(data_version.bump_statement(current_user.id))
     db.commit()
     db.refresh(new_habit)
     return new_habit
@@ -64,27 +169,61 @@ def create_habit(
 # GET MY HABITS
 # =========================
 @router.get("/", response_model=List[HabitResponse])
-def get_my_habits(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_my_habits(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    return (
-        db.query(Habit)
-        .filter(Habit.user_id == current_user.id)
-        .all()
+    etag, not_modified = await data_version.check_not_modified(
+        db, current_user.id, request
     )
+    if not_modified:
+        return not_modified
+    response.headers.update(data_version.cache_headers(etag))
+
+    if FAST_JSON_RESPONSES:
+        rows = await db.execute(
+            select(Habit.id, Habit.name).where(Habit.user_id == current_user.id)
+        )
+        return rows_response(
+            _habit_rows, ("id", "name"), rows, data_version.cache_headers(etag)
+        )
+
+    result = await db.execute(
+        select(Habit).where(Habit.user_id == current_user.id)
+    )
+    return result.scalars().all()
 
 
 # =========================
 # GET HABIT LOGS FOR MONTH
 # =========================
+async def _user_habit_ids(db: AsyncSession, user_id: int) -> list[int]:
+    result = await db.execute(
+        select(Habit.id).where(Habit.user_id == user_id).order_by(Habit.id)
+    )
+    return result.scalars().all()
+
+
 @router.get("/logs", response_model=List[HabitLogResponse])
-def get_habit_logs_for_month(
-    year: int,
-    month: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_habit_logs_for_month(
+    request: Request,
+    response: Response,
+    # le=9998: the range end is built as date(year + 1, 1, 1)
+    year: int = Query(..., ge=1970, le=9998),
+    month: int = Query(..., ge=1, le=12),
+    format: Literal["full", "compact"] = "full",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
+    etag, not_modified = await data_version.check_not_modified(
+        db, current_user.id, request
+    )
+    if not_modified:
+        return not_modified
+    response.headers.update(data_version.cache_headers(etag))
+
     start = date(year, month, 1)
     end = (
         date(year + 1, 1, 1)
@@ -92,66 +231,201 @@ def get_habit_logs_for_month(
         else date(year, month + 1, 1)
     )
 
-    return (
-        db.query(HabitLog)
+    if format == "compact":
+        # habit ids × day offsets as packed bits, see calendar_format.py
+        rows = await db.execute(
+            select(
+                HabitLog.habit_id,
+                HabitLog.date,
+                HabitLog.completed,
+                HabitLog.sleep_hours,
+            ).where(
+                HabitLog.user_id == current_user.id,
+                HabitLog.date >= start,
+                HabitLog.date < end
+            )
+        )
+        habit_ids = await _user_habit_ids(db, current_user.id)
+        return JSONResponse(
+            calendar_format.compact_month(year, month, habit_ids, rows.all()),
+            headers=data_version.cache_headers(etag),
+        )
+
+    if FAST_JSON_RESPONSES:
+        rows = await db.execute(
+            select(
+                HabitLog.habit_id,
+                HabitLog.date,
+                HabitLog.completed,
+                HabitLog.sleep_hours,
+            )
+            .join(Habit)
+            .where(
+                Habit.user_id == current_user.id,
+                HabitLog.date >= start,
+                HabitLog.date < end
+            )
+        )
+        return rows_response(
+            _habit_log_rows,
+            ("habit_id", "date", "completed", "sleep_hours"),
+            rows,
+            data_version.cache_headers(etag),
+        )
+
+    result = await db.execute(
+        select(HabitLog)
         .join(Habit)
-        .filter(
+        .where(
             Habit.user_id == current_user.id,
             HabitLog.date >= start,
             HabitLog.date < end
         )
-        .all()
     )
+    return result.scalars().all()
 
 
 # =========================
-# TOGGLE HABIT FOR A DAY
+# STREAKS
 # =========================
-@router.post("/{habit_id}/toggle", response_model=HabitLogResponse)
-def toggle_habit(
-    habit_id: int,
-    payload: HabitToggle,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/streaks", response_model=List[HabitStreakResponse])
+async def get_habit_streaks(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    log_date = payload.date or date.today()
+    # served from habit_streaks, one row per habit
+    return await streaks.get_streaks(db, current_user.id)
 
-    habit = db.query(Habit).filter(Habit.id == habit_id).first()
 
-    if not habit:
-        raise HTTPException(404, "Habit not found")
+# =========================
+# MONTHLY COMPLETION STATS
+# =========================
+@router.get("/stats/monthly", response_model=List[HabitMonthlyStats])
+async def get_monthly_stats(
+    months: int = Query(12, ge=1, le=60),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # answered from habit_month_stats: at most months × #habits rows
+    return await rollups.completion_by_month(db, current_user.id, months)
+
+
+# =========================
+# YEARLY STATS (bitset store)
+# =========================
+@router.get("/stats/year", response_model=List[HabitYearStats])
+async def get_year_stats(
+    year: Optional[int] = Query(None, ge=1970, le=9998),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    year = year or date.today().year
+
+    habit_ids = await _user_habit_ids(db, current_user.id)
+    bits = await bitsets.load_year(db, current_user.id, year)
+    return habit_stats.year_summary(bits, habit_ids, year)
 
-    if habit.user_id != current_user.id:
-        raise HTTPException(403, "Not authorized")
 
-    log = (
-        db.query(HabitLog)
-        .filter(
-            HabitLog.habit_id == habit_id,
+# =========================
+# YEARLY HEATMAP (compact)
+# =========================
+@router.get("/heatmap")
+async def get_heatmap(
+    request: Request,
+    response: Response,
+    year: Optional[int] = Query(None, ge=1970, le=9998),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # whole year for all habits: one 46 byte bitset per habit + sparse sleep
+    year = year or date.today().year
+
+    # the year is part of the tag: /heatmap without ?year= changes meaning
+    # on January 1st while the URL and data version stay the same
+    etag, not_modified = await data_version.check_not_modified(
+        db, current_user.id, request, {"year": year}
+    )
+    if not_modified:
+        return not_modified
+    response.headers.update(data_version.cache_headers(etag))
+
+    habit_ids = await _user_habit_ids(db, current_user.id)
+    bits = await bitsets.load_year(db, current_user.id, year)
+    sleep_rows = await db.execute(
+        select(HabitLog.habit_id, HabitLog.date, HabitLog.sleep_hours).where(
             HabitLog.user_id == current_user.id,
-            HabitLog.date == log_date
+            HabitLog.date >= date(year, 1, 1),
+            HabitLog.date < date(year + 1, 1, 1),
+            HabitLog.sleep_hours.is_not(None),
         )
-        .first()
     )
 
-    if log:
-        log.completed = not log.completed
-    else:
-        log = HabitLog(
-            habit_id=habit_id,
-            user_id = current_user.id,
-            date=log_date,
-            completed=True
-        )
-        db.add(log)
+    return calendar_format.yearly_heatmap(year, habit_ids, bits, sleep_rows.all())
+
+
+# =========================
+# TOGGLE HABIT FOR A DAY
+# =========================
+@router.post("/{habit_id}/toggle", response_model=HabitLogResponse)
+async def toggle_habit(
+    habit_id: int,
+    payload: HabitToggle,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    log_date = payload.date or date.today()
+
+    # One statement: the INSERT only produces a row when the habit belongs
+    # to the caller, and ON CONFLICT turns it into the toggle. Concurrent
+    # toggles of the same day serialize on the unique_habit_day row lock.
+    owned_habit = select(
+        literal(current_user.id),
+        Habit.id,
+        literal(log_date, Date),
+        true(),
+        literal(payload.sleep_hours, Integer),
+    ).where(
+        Habit.id == habit_id,
+        Habit.user_id == current_user.id,
+    )
+
+    stmt = upsert(HabitLog).from_select(
+        ["user_id", "habit_id", "date", "completed", "sleep_hours"],
+        owned_habit,
+    )
 
     # If sleep hours provided → auto mark completed
     if payload.sleep_hours is not None:
-        log.sleep_hours = payload.sleep_hours
-        log.completed = True
+        on_conflict = {"completed": true(), "sleep_hours": stmt.excluded.sleep_hours}
+    else:
+        on_conflict = {"completed": not_(HabitLog.completed)}
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "habit_id", "date"],   # unique_habit_day
+        set_=on_conflict,
+    ).returning(
+        HabitLog.habit_id,
+        HabitLog.date,
+        HabitLog.completed,
+        HabitLog.sleep_hours,
+    )
 
-    db.commit()
-    db.refresh(log)
+    log = (await db.execute(stmt)).first()
+
+    if log is None:
+        # slow path, only to pick the right error
+        owner_id = await db.scalar(select(Habit.user_id).where(Habit.id == habit_id))
+        await db.rollback()
+
+        if owner_id is None:
+            raise HTTPException(404, "Habit not found")
+        raise HTTPException(403, "Not authorized")
+
+    await log_hooks.after_toggle(
+        db, current_user.id, habit_id, log.date, log.completed
+    )
+    await db.execute(data_version.bump_statement(current_user.id))
+    await db.commit()
 
     return {
         "habit_id": log.habit_id,
@@ -161,6 +435,157 @@ def toggle_habit(
     }
 
 
+# =========================
+# BATCH WRITE (offline replay)
+# =========================
+BATCH_MAX_ITEMS = 5000
+
+
+@router.post("/batch", response_model=HabitBatchResponse)
+async def batch_write(
+    payload: HabitBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    if len(payload.entries) + len(payload.habits) > BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"At most {BATCH_MAX_ITEMS} items per batch")
+
+    # new habits first, so entries can reference them by ref
+    new_habits = [
+        Habit(name=h.name, user_id=current_user.id) for h in payload.habits
+    ]
+    if new_habits:
+        db.add_all(new_habits)
+        await db.flush()
+
+    ref_ids = {h.ref: obj.id for h, obj in zip(payload.habits, new_habits)}
+
+    # one ownership query for every habit id referenced
+    ids = {e.habit_id for e in payload.entries if e.habit_id is not None}
+    owners = {}
+    if ids:
+        result = await db.execute(
+            select(Habit.id, Habit.user_id).where(Habit.id.in_(ids))
+        )
+        owners = dict(result.all())
+
+    results = []
+    rows = {}
+    for index, entry in enumerate(payload.entries):
+        item = {"index": index, "habit_id": entry.habit_id, "date": entry.date}
+
+        if entry.habit_id is None:
+            item["habit_id"] = ref_ids.get(entry.habit_ref)
+            item["status"] = "unknown_ref" if item["habit_id"] is None else "applied"
+        elif entry.habit_id not in owners:
+            item["status"] = "not_found"
+        elif owners[entry.habit_id] != current_user.id:
+            item["status"] = "forbidden"
+        else:
+            item["status"] = "applied"
+
+        if item["status"] == "applied":
+            # same semantics as toggle: sleep hours imply completed;
+            # later entries for the same day win
+            rows[(item["habit_id"], entry.date)] = {
+                "user_id": current_user.id,
+                "habit_id": item["habit_id"],
+                "date": entry.date,
+                "completed": entry.completed or entry.sleep_hours is not None,
+                "sleep_hours": entry.sleep_hours,
+            }
+        results.append(item)
+
+    # entries are capped at BATCH_MAX_ITEMS, so this is one multi-row upsert
+    stored = {}
+    if rows:
+        stmt = upsert(HabitLog).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "habit_id", "date"],   # unique_habit_day
+            set_={
+                "completed": stmt.excluded.completed,
+                "sleep_hours": func.coalesce(
+                    stmt.excluded.sleep_hours, HabitLog.sleep_hours
+                ),
+            },
+        ).returning(
+            HabitLog.habit_id,
+            HabitLog.date,
+            HabitLog.completed,
+            HabitLog.sleep_hours,
+        )
+        result = await db.execute(stmt)
+        stored = {(r.habit_id, r.date): r for r in result}
+
+        await log_hooks.after_bulk_write(
+            db, current_user.id, log_hooks.date_ranges(rows)
+        )
+
+    if new_habits or rows:
+        await db.execute(data_version.bump_statement(current_user.id))
+    await db.commit()
+
+    for item in results:
+        row = stored.get((item["habit_id"], item["date"]))
+        if item["status"] == "applied" and row is not None:
+            item["completed"] = row.completed
+            item["sleep_hours"] = row.sleep_hours
+
+    return {
+        "habits": [
+            {"ref": h.ref, "id": obj.id, "name": obj.name}
+            for h, obj in zip(payload.habits, new_habits)
+        ],
+        "entries": results,
+    }
+
+
+# =========================
+# IMPORT HABIT LOG HISTORY
+# =========================
+@router.post("/import")
+async def import_habit_history(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # body is streamed: one JSON object per line, or CSV with a header row
+    # (habit_id,date,completed,sleep_hours)
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+
+    try:
+        return await import_habit_logs(db, current_user.id, request.stream(), format)
+    except (HabitImportError, UnicodeDecodeError) as e:
+        raise HTTPException(400, f"Invalid import file: {e}")
+
+
+# =========================
+# EXPORT FULL HISTORY
+# =========================
+@router.get("/export")
+async def export_habit_history(
+    format: Literal["csv", "ndjson"] = "csv",
+    gzip: bool = False,
+    current_user: Principal = Depends(get_current_user),
+):
+    extension = "csv" if format == "csv" else "ndjson"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        extension += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        export_habits(current_user.id, format, gzip),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="habits-export.{extension}"'
+        },
+    )
+
+
 # =========================
 # DELETE HABIT
 # =========================
@@ -168,7 +593,7 @@ def toggle_habit(
 def delete_habit(
     habit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     habit = db.query(Habit).filter(Habit.id == habit_id).first()
 
@@ -179,5 +604,6 @@ def delete_habit(
         raise HTTPException(403, "Not authorized")
 
     db.delete(habit)
+    db.execute(data_version.bump_statement(current_user.id))
     db.commit()
     return {"message": "Habit deleted"}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.core.startup import startup_pipeline, ping_database, READYZ_DB_TIMEOUT
+
+router = APIRouter(tags=["Health"])
+
+
+# =========================
+# LIVENESS
+# =========================
+@router.get("/healthz")
+async def healthz():
+    # the event loop answered; deliberately no database here, a DB outage
+    # should pull the pod out of rotation (readyz), not restart it
+    return {"status": "ok"}
+
+
+# =========================
+# READINESS
+# =========================
+@router.get("/readyz")
+async def readyz():
+    report = startup_pipeline.report()
+
+    if not report["ready"]:
+        failed = any(p["status"] == "failed" for p in report["phases"].values())
+        return JSONResponse(
+            {"status": "failed" if failed else "starting", **report},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    try:
+        await ping_database(READYZ_DB_TIMEOUT)
+    except Exception as e:
+        return JSONResponse(
+            {"status": "unavailable", "database": repr(e), **report},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    return {"status": "ready", "database": "ok", **report}
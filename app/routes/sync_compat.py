@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import List
+
+from app.database import get_db
+from app.models.habit import Habit, HabitLog
+from app.models.user import User
+from app.schemas.user import TokenResponse, UserResponse
+from app.routes.habit import HabitResponse, HabitLogResponse
+from app.core.refresh_tokens import issue_refresh_token
+from app.core.security import (
+    verify_password,
+    create_access_token,
+    get_current_user_sync,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+
+# Blocking (threadpool) versions of the hot routes, served under /sync.
+# Only mounted when ENABLE_SYNC_ROUTES=1 so the async stack can be
+# benchmarked side by side against the old behaviour. Read-only apart from
+# login: writes to habit_logs must go through app/services/log_hooks and
+# bump the data version, so toggling is only served by the async /habits.
+router = APIRouter(prefix="/sync", tags=["Sync compat"])
+
+
+@router.get("/users/me", response_model=UserResponse)
+def get_me_sync(current_user: User = Depends(get_current_user_sync)):
+    return current_user
+
+
+@router.post("/users/login", response_model=TokenResponse)
+def login_user_sync(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
+):
+    user = db.query(User).filter(User.email == form_data.username.lower()).first()
+
+    if not user or not verify_password(
+        form_data.password, user.hashed_password
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials",
+        )
+
+    access_token = create_access_token(
+        data={"sub": str(user.id)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    refresh_token = issue_refresh_token(db, user.id)
+    db.commit()
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.get("/habits/", response_model=List[HabitResponse])
+def get_my_habits_sync(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_sync),
+):
+    return (
+        db.query(Habit)
+        .filter(Habit.user_id == current_user.id)
+        .all()
+    )
+
+
+@router.get("/habits/logs", response_model=List[HabitLogResponse])
+def get_habit_logs_for_month_sync(
+    year: int,
+    month: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_sync),
+):
+    start = date(year, month, 1)
+    end = (
+        date(year + 1, 1, 1)
+        if month == 12
+        else date(year, month + 1, 1)
+    )
+
+    return (
+        db.query(HabitLog)
+        .join(Habit)
+        .filter(
+            Habit.user_id == current_user.id,
+            HabitLog.date >= start,
+            HabitLog.date < end
+        )
+        .all()
+    )
+
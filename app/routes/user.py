@@ -1,37 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from pydantic import BaseModel
-from typing import List
-from datetime import timedelta, datetime
-
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Literal, Optional
+from typing_extensions import TypedDict
+from datetime import timedelta
+
+from app.database import get_db, get_async_db, SessionLocal, upsert, PG_MAX_BIND_PARAMS
 from app.models.user import User
-from app.models.refresh_token import RefreshToken
+
+from app.services import user_search
+from app.utils import fast_json
+from app.utils.fast_json import FAST_JSON_RESPONSES, rows_response
 
 from app.schemas.user import (
     UserCreate,
     UserResponse,
     UserUpdate,
     TokenResponse,
+    BulkUserImportResponse,
 )
 
+from app.core.refresh_tokens import (
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_token,
+)
 from app.core.security import (
     hash_password,
-    verify_password,
+    hash_passwords_async,
+    verify_password_async,
     create_access_token,
-    create_refresh_token,
-    verify_refresh_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_user,
     require_admin,
-    REFRESH_TOKEN_EXPIRE_DAYS,
+    invalidate_principal,
+    Principal,
 )
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
+# Plain-dict row shape for the fast read path (app/utils/fast_json.py);
+# keep it in step with UserResponse so both paths agree on nulls
+class UserRow(TypedDict):
+    id: int
+    name: str
+    email: Optional[str]
+    role: Optional[str]
+
+
+USER_ROW_FIELDS = ("id", "name", "email", "role")
+_user_rows = TypeAdapter(List[UserRow])
+
+
 # =========================
 # CREATE USER
 # =========================
@@ -49,46 +76,115 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    user_search.user_saved(new_user.id, new_user.name, new_user.email)
     return new_user
 
 
 # =========================
 # BULK CREATE USERS
 # =========================
-@router.post("/bulk", response_model=List[UserResponse])
-def create_users_bulk(users: List[UserCreate], db: Session = Depends(get_db)):
-    created_users = []
+BULK_IMPORT_MAX_ROWS = 10000
+BULK_LOOKUP_CHUNK = 5000   # emails per IN (...) lookup, one bind each
+
+# A multi-row INSERT binds every column the insert fills in (including the
+# Python-side defaults), and Postgres caps a statement at 32767 binds.
+# Sizing by the table's full column count keeps a margin for new columns.
+BULK_INSERT_CHUNK = PG_MAX_BIND_PARAMS // len(User.__table__.columns)
 
-    for user in users:
-        if db.query(User).filter(User.email == user.email).first():
-            continue
 
-        new_user = User(
-            name=user.name,
-            email=user.email.lower(),
-            hashed_password=hash_password(user.password),
+@router.post("/bulk", response_model=BulkUserImportResponse)
+async def create_users_bulk(
+    users: List[UserCreate],
+    db: AsyncSession = Depends(get_async_db),
+):
+    if len(users) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_IMPORT_MAX_ROWS} users per request",
         )
-        db.add(new_user)
-        created_users.append(new_user)
 
-    db.commit()
-    for u in created_users:
-        db.refresh(u)
+    results: list[dict] = []
+    first_seen: dict[str, int] = {}
+
+    # de-duplicate inside the payload (first occurrence wins)
+    for index, user in enumerate(users):
+        email = user.email.lower()
+        if email in first_seen:
+            results.append(
+                {"index": index, "email": email, "status": "duplicate_in_payload"}
+            )
+            continue
+        first_seen[email] = index
+        results.append({"index": index, "email": email, "status": "created"})
+
+    # one IN query for emails that already exist
+    existing: set[str] = set()
+    emails = list(first_seen)
+    for i in range(0, len(emails), BULK_LOOKUP_CHUNK):
+        result = await db.execute(
+            select(User.email).where(User.email.in_(emails[i:i + BULK_LOOKUP_CHUNK]))
+        )
+        existing.update(result.scalars().all())
+
+    for email in existing:
+        results[first_seen[email]]["status"] = "exists"
+
+    pending = [r for r in results if r["status"] == "created"]
+    hashes = await hash_passwords_async([users[r["index"]].password for r in pending])
+
+    rows = [
+        {
+            "name": users[r["index"]].name,
+            "email": r["email"],
+            "hashed_password": hashed,
+        }
+        for r, hashed in zip(pending, hashes)
+    ]
+
+    created_ids: dict[str, int] = {}
+    for i in range(0, len(rows), BULK_INSERT_CHUNK):
+        stmt = (
+            upsert(User)
+            .values(rows[i:i + BULK_INSERT_CHUNK])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id, User.email)
+        )
+        result = await db.execute(stmt)
+        created_ids.update({row.email: row.id for row in result})
+
+    await db.commit()
+
+    for r, row in zip(pending, rows):
+        if r["email"] in created_ids:
+            r["id"] = created_ids[r["email"]]
+            user_search.user_saved(r["id"], row["name"], row["email"])
+        else:
+            # inserted concurrently by someone else
+            r["status"] = "exists"
 
-    return created_users
+    created = len(created_ids)
+    return {
+        "received": len(users),
+        "created": created,
+        "skipped": len(users) - created,
+        "results": results,
+    }
 
 
 # =========================
 # LOGIN
 # =========================
 @router.post("/login", response_model=TokenResponse)
-def login_user(
+async def login_user(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(User).filter(User.email == form_data.username.lower()).first()
+    result = await db.execute(
+        select(User).where(User.email == form_data.username.lower())
+    )
+    user = result.scalars().first()
 
-    if not user or not verify_password(
+    if not user or not await verify_password_async(
         form_data.password, user.hashed_password
     ):
         raise HTTPException(
@@ -96,28 +192,13 @@ def login_user(
             detail="Invalid credentials",
         )
 
-    # revoke old refresh tokens (optional but professional)
-    db.query(RefreshToken).filter(
-        RefreshToken.user_id == user.id,
-        RefreshToken.revoked == False,
-    ).update({"revoked": True})
-
+    # every login starts its own token family, other devices stay signed in
     access_token = create_access_token(
-    data={"sub": str(user.id)},
-    expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
-    )
-    refresh_token = create_refresh_token(
-    data={"sub": str(user.id)}
-    )
-
-    db_refresh_token = RefreshToken(
-        token=refresh_token,
-        user_id=user.id,
-        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        data={"sub": str(user.id)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
-
-    db.add(db_refresh_token)
-    db.commit()
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
 
     return {
         "access_token": access_token,
@@ -134,37 +215,23 @@ class RefreshRequest(BaseModel):
     refresh_token: str
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_access_token(
+async def refresh_access_token(
     payload: RefreshRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    refresh_token = payload.refresh_token
-
-    payload_data = verify_refresh_token(refresh_token)
-
-    token_entry = (
-        db.query(RefreshToken)
-        .filter(
-            RefreshToken.token == refresh_token,
-            RefreshToken.revoked == False,
-        )
-        .first()
+    # rotates: the presented token is revoked and a new one is returned
+    user_id, new_refresh_token = await rotate_refresh_token(
+        db, payload.refresh_token
     )
 
-    if not token_entry:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token not found or revoked",
-        )
-
     new_access_token = create_access_token(
-        data={"sub": payload_data["sub"]},
+        data={"sub": str(user_id)},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
 
     return {
         "access_token": new_access_token,
-        "refresh_token": refresh_token,
+        "refresh_token": new_refresh_token,
         "token_type": "bearer",
     }
 
@@ -177,24 +244,13 @@ class LogoutRequest(BaseModel):
 
 
 @router.post("/logout")
-def logout(payload: LogoutRequest, db: Session = Depends(get_db)):
-    refresh_token = payload.refresh_token
-
-    token_entry = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.token == refresh_token)
-        .first()
-    )
-
-    if not token_entry:
+async def logout(payload: LogoutRequest, db: AsyncSession = Depends(get_async_db)):
+    if not await revoke_refresh_token(db, payload.refresh_token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token",
         )
 
-    token_entry.revoked = True
-    db.commit()
-
     return {"message": "Logged out successfully"}
 
 
@@ -202,8 +258,17 @@ def logout(payload: LogoutRequest, db: Session = Depends(get_db)):
 # GET CURRENT USER
 # =========================
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def get_me(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # the principal is slim, the profile needs the full row
+    user = await db.get(User, current_user.id)
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user
 
 
 # =========================
@@ -211,22 +276,52 @@ def get_me(current_user: User = Depends(get_current_user)):
 # =========================
 @router.get("/", response_model=List[UserResponse])
 def get_users(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(10, ge=1, le=100),
+    # keyset pagination: pass the X-Next-Cursor of the previous page
+    cursor: int | None = Query(None, ge=0),
+    # deprecated, degrades linearly on deep pages; ignored when cursor is set
     offset: int = Query(0, ge=0),
     search: str | None = None,
 ):
-    query = db.query(User)
-
     if search:
-        query = query.filter(
-            or_(
-                User.name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
+        # ranked by relevance, so paged with limit/offset only
+        if cursor is not None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="cursor cannot be combined with search; page with offset",
             )
+        users = user_search.search_backend.search(db, search, limit, offset)
+        response.headers["X-Search-Backend"] = user_search.search_backend.name
+        return users
+
+    if FAST_JSON_RESPONSES:
+        query = select(User.id, User.name, User.email, User.role).order_by(User.id)
+        if cursor is not None:
+            query = query.where(User.id > cursor)
+        else:
+            query = query.offset(offset)
+
+        rows = db.execute(query.limit(limit)).all()
+        headers = (
+            {"X-Next-Cursor": str(rows[-1].id)} if len(rows) == limit else None
         )
+        return rows_response(_user_rows, USER_ROW_FIELDS, rows, headers)
+
+    query = db.query(User).order_by(User.id)
+
+    if cursor is not None:
+        query = query.filter(User.id > cursor)
+    else:
+        query = query.offset(offset)
+
+    users = query.limit(limit).all()
+
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
 
-    return query.offset(offset).limit(limit).all()
+    return users
 
 
 # =========================
@@ -276,6 +371,8 @@ def update_user(
 
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.id)
+    user_search.user_saved(user.id, user.name, user.email)
     return user
 
 
@@ -286,7 +383,7 @@ def update_user(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_admin),
+    admin_user: Principal = Depends(require_admin),
 ):
     user = db.query(User).filter(User.id == user_id).first()
 
@@ -295,12 +392,59 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
+    user_search.user_deleted(user_id)
 
     return {"message": "User deleted by admin"}
 
+# =========================
+# ADMIN: ALL USERS (STREAMED)
+# =========================
+ADMIN_LIST_CHUNK = 1000
+
+
+def _stream_users(fmt: str):
+    # Own session: the request's get_db session is closed before the body
+    # is streamed. yield_per makes psycopg2 use a server-side cursor, so
+    # only one chunk of rows is in memory at a time.
+    with SessionLocal() as db:
+        result = db.execute(
+            select(User.id, User.name, User.email, User.role)
+            .order_by(User.id)
+            .execution_options(yield_per=ADMIN_LIST_CHUNK)
+        )
+
+        first = True
+        if fmt == "json":
+            yield "["
+
+        for rows in result.partitions():
+            if FAST_JSON_RESPONSES:
+                validated = _user_rows.validate_python(
+                    [dict(zip(USER_ROW_FIELDS, r)) for r in rows]
+                )
+                encoded = [fast_json.dumps(r).decode() for r in validated]
+            else:
+                encoded = [
+                    json.dumps(
+                        {"id": r.id, "name": r.name, "email": r.email, "role": r.role}
+                    )
+                    for r in rows
+                ]
+            if fmt == "ndjson":
+                yield "\n".join(encoded) + "\n"
+            else:
+                yield ("" if first else ",") + ",".join(encoded)
+            first = False
+
+        if fmt == "json":
+            yield "]"
+
+
 @router.get("/admin/all-users", response_model=List[UserResponse])
 def get_all_users_admin(
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(require_admin),
+    format: Literal["json", "ndjson"] = "json",
+    admin_user: Principal = Depends(require_admin),
 ):
-    return db.query(User).all()
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(_stream_users(format), media_type=media_type)
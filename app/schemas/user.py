@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, List, Literal
 
 
 class UserCreate(BaseModel):
@@ -28,9 +28,24 @@ class TokenResponse(BaseModel):
 class UserResponse(BaseModel):
     id: int
     name: str
-    email: EmailStr
-    role: str
+    # phone and Google sign-ups have no email; role is a nullable column too
+    email: Optional[EmailStr] = None
+    role: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+
+class BulkUserResult(BaseModel):
+    index: int
+    email: str
+    # created | exists | duplicate_in_payload
+    status: Literal["created", "exists", "duplicate_in_payload"]
+    id: Optional[int] = None
+
+
+class BulkUserImportResponse(BaseModel):
+    received: int
+    created: int
+    skipped: int
+    results: List[BulkUserResult]
@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+from datetime import date
+from itertools import groupby
+
+from sqlalchemy import select, func, and_, or_, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine, upsert, PG_MAX_BIND_PARAMS
+from app.models.habit import Habit, HabitLog, HabitYearBits
+
+DAYS_PER_YEAR = 366
+BYTES_PER_YEAR = (DAYS_PER_YEAR + 7) // 8   # 46
+
+# rows per multi-row upsert; a wide import (many habits x many years)
+# would otherwise go past Postgres' bind parameter limit in one statement
+REBUILD_CHUNK = PG_MAX_BIND_PARAMS // len(HabitYearBits.__table__.columns)
+
+
+def day_index(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def pack_days(days) -> bytes:
+    bits = bytearray(BYTES_PER_YEAR)
+    for day in days:
+        n = day_index(day)
+        bits[n >> 3] |= 1 << (n & 7)
+    return bytes(bits)
+
+
+def is_set(bits: bytes, day: date) -> bool:
+    n = day_index(day)
+    return bool(bits[n >> 3] & (1 << (n & 7)))
+
+
+def with_day(bits: bytes, day: date, completed: bool) -> bytes:
+    """Copy of `bits` with `day` set or cleared (Python twin of Postgres set_bit)."""
+    n = day_index(day)
+    out = bytearray(bits)
+    if completed:
+        out[n >> 3] |= 1 << (n & 7)
+    else:
+        out[n >> 3] &= ~(1 << (n & 7)) & 0xFF
+    return bytes(out)
+
+
+# =========================
+# WRITE PATH
+# =========================
+
+async def set_day(
+    db: AsyncSession,
+    user_id: int,
+    habit_id: int,
+    day: date,
+    completed: bool,
+):
+    # single upsert; flips one bit in place on the existing row
+    if engine.dialect.name == "postgresql":
+        new_bits = func.set_bit(HabitYearBits.bits, day_index(day), int(completed))
+    else:
+        # no set_bit on SQLite (dev): flip it on the stored value; SQLite
+        # serializes writers, so the read-modify-write can't race
+        stored = await db.scalar(
+            select(HabitYearBits.bits).where(
+                HabitYearBits.habit_id == habit_id,
+                HabitYearBits.year == day.year,
+            )
+        )
+        new_bits = with_day(stored or bytes(BYTES_PER_YEAR), day, completed)
+
+    stmt = upsert(HabitYearBits).values(
+        habit_id=habit_id,
+        year=day.year,
+        user_id=user_id,
+        bits=pack_days([day] if completed else []),
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[HabitYearBits.habit_id, HabitYearBits.year],
+            set_={"bits": new_bits},
+        )
+    )
+
+
+async def rebuild_ranges(
+    db: AsyncSession,
+    user_id: int,
+    ranges: dict[int, tuple[date, date]],
+):
+    """Re-pack every (habit, year) touched by `ranges` from habit_logs."""
+    if not ranges:
+        return
+
+    windows = [
+        and_(
+            HabitLog.habit_id == habit_id,
+            HabitLog.date >= date(first.year, 1, 1),
+            HabitLog.date < date(last.year + 1, 1, 1),
+        )
+        for habit_id, (first, last) in ranges.items()
+    ]
+    rows = await db.execute(
+        select(HabitLog.habit_id, HabitLog.date)
+        .where(
+            HabitLog.user_id == user_id,
+            HabitLog.completed == True,
+            or_(*windows),
+        )
+        .order_by(HabitLog.habit_id, HabitLog.date)
+    )
+
+    completed = {}
+    for (habit_id, year), days in groupby(rows, key=lambda r: (r.habit_id, r.date.year)):
+        completed[(habit_id, year)] = [r.date for r in days]
+
+    values = [
+        {
+            "habit_id": habit_id,
+            "year": year,
+            "user_id": user_id,
+            "bits": pack_days(completed.get((habit_id, year), [])),
+        }
+        for habit_id, (first, last) in ranges.items()
+        for year in range(first.year, last.year + 1)
+    ]
+
+    for i in range(0, len(values), REBUILD_CHUNK):
+        stmt = upsert(HabitYearBits).values(values[i:i + REBUILD_CHUNK])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[HabitYearBits.habit_id, HabitYearBits.year],
+                set_={"bits": stmt.excluded.bits},
+            )
+        )
+
+
+# =========================
+# READ PATH
+# =========================
+
+async def load_year(db: AsyncSession, user_id: int, year: int) -> dict[int, bytes]:
+    result = await db.execute(
+        select(HabitYearBits.habit_id, HabitYearBits.bits).where(
+            HabitYearBits.user_id == user_id,
+            HabitYearBits.year == year,
+        )
+    )
+    return {habit_id: bytes(bits) for habit_id, bits in result}
+
+
+# =========================
+# REBUILD
+# =========================
+
+async def rebuild_all(batch_size: int = 500, user_id: int | None = None) -> int:
+    from app.database import AsyncSessionLocal
+
+    rebuilt = 0
+    after_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = (
+                select(Habit.id, Habit.user_id)
+                .where(Habit.id > after_id)
+                .order_by(Habit.id)
+                .limit(batch_size)
+            )
+            if user_id is not None:
+                query = query.where(Habit.user_id == user_id)
+
+            habits = (await db.execute(query)).all()
+            if not habits:
+                return rebuilt
+
+            habit_ids = [h.id for h in habits]
+            spans = await db.execute(
+                select(HabitLog.habit_id, func.min(HabitLog.date), func.max(HabitLog.date))
+                .where(HabitLog.habit_id.in_(habit_ids))
+                .group_by(HabitLog.habit_id)
+            )
+            spans = {habit_id: (first, last) for habit_id, first, last in spans}
+
+            await db.execute(
+                delete(HabitYearBits).where(HabitYearBits.habit_id.in_(habit_ids))
+            )
+            by_user = {}
+            for habit_id, owner_id in habits:
+                if habit_id in spans:
+                    by_user.setdefault(owner_id, {})[habit_id] = spans[habit_id]
+            for owner_id, ranges in by_user.items():
+                await rebuild_ranges(db, owner_id, ranges)
+
+            await db.commit()
+            rebuilt += len(habits)
+            after_id = habit_ids[-1]
+
+
+if __name__ == "__main__":
+    # python -m app.services.bitsets rebuild [--user-id N] [--batch-size N]
+    parser = argparse.ArgumentParser(description="Habit completion bitset maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    count = asyncio.run(rebuild_all(args.batch_size, args.user_id))
+    print(f"✅ Rebuilt completion bitsets for {count} habits")
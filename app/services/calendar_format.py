@@ -0,0 +1,85 @@
+import base64
+import calendar
+from datetime import date
+
+# Compact calendar payloads: one packed bitstring per habit instead of one
+# object per habit-day.
+#
+#   completed[i]  base64 of the completion bits of habit_ids[i];
+#                 bit n (LSB first within each byte) = day offset n
+#   sleep         sparse struct-of-arrays, only days with sleep_hours set
+
+ENCODING = "base64-bits-lsb"
+
+
+def encode_bits(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def pack_offsets(offsets, days: int) -> bytes:
+    bits = bytearray((days + 7) // 8)
+    for n in offsets:
+        bits[n >> 3] |= 1 << (n & 7)
+    return bytes(bits)
+
+
+def _sparse_sleep(entries, index: dict[int, int], start: date) -> dict:
+    sleep = {"habit": [], "day": [], "hours": []}
+    for habit_id, day, hours in entries:
+        sleep["habit"].append(index[habit_id])
+        sleep["day"].append((day - start).days)
+        sleep["hours"].append(hours)
+    return sleep
+
+
+def compact_month(year: int, month: int, habit_ids: list[int], rows) -> dict:
+    """`rows` are (habit_id, date, completed, sleep_hours) for the month."""
+    start = date(year, month, 1)
+    days = calendar.monthrange(year, month)[1]
+    index = {habit_id: i for i, habit_id in enumerate(habit_ids)}
+
+    completed = [[] for _ in habit_ids]
+    sleep_entries = []
+    for habit_id, day, done, sleep_hours in rows:
+        if habit_id not in index:
+            continue
+        if done:
+            completed[index[habit_id]].append((day - start).days)
+        if sleep_hours is not None:
+            sleep_entries.append((habit_id, day, sleep_hours))
+
+    return {
+        "year": year,
+        "month": month,
+        "days": days,
+        "encoding": ENCODING,
+        "habit_ids": habit_ids,
+        "completed": [encode_bits(pack_offsets(o, days)) for o in completed],
+        "sleep": _sparse_sleep(sleep_entries, index, start),
+    }
+
+
+def yearly_heatmap(
+    year: int,
+    habit_ids: list[int],
+    bits_by_habit: dict[int, bytes],
+    sleep_rows,
+) -> dict:
+    """Year bitsets come straight from habit_year_bits (same bit layout)."""
+    days = 366 if calendar.isleap(year) else 365
+    index = {habit_id: i for i, habit_id in enumerate(habit_ids)}
+    empty = bytes((days + 7) // 8)
+
+    return {
+        "year": year,
+        "days": days,
+        "encoding": ENCODING,
+        "habit_ids": habit_ids,
+        "completed": [
+            encode_bits(bits_by_habit.get(habit_id, empty)[: len(empty)])
+            for habit_id in habit_ids
+        ],
+        "sleep": _sparse_sleep(
+            (r for r in sleep_rows if r[0] in index), index, date(year, 1, 1)
+        ),
+    }
@@ -0,0 +1,74 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import upsert
+from app.models.data_version import UserDataVersion
+
+
+def bump_statement(user_id: int):
+    """Upsert that increments the user's version; run it in the write's transaction."""
+    stmt = upsert(UserDataVersion).values(user_id=user_id, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserDataVersion.user_id],
+        set_={"version": UserDataVersion.version + 1},
+    )
+
+
+async def current_version(db: AsyncSession, user_id: int) -> int:
+    version = await db.scalar(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+    )
+    return version or 0
+
+
+# =========================
+# ETAGS
+# =========================
+
+def make_etag(user_id: int, version: int, request: Request, resolved: dict | None = None) -> str:
+    # strong validator: same user + version + URL always renders the same bytes.
+    # `resolved` holds what the route fills in itself (a year defaulted from
+    # today's date) so the tag changes when the URL alone does not.
+    variant = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    if resolved:
+        variant += f"#{sorted(resolved.items())}"
+    digest = hashlib.sha256(f"{user_id}:{variant}".encode()).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+
+
+async def check_not_modified(
+    db: AsyncSession,
+    user_id: int,
+    request: Request,
+    resolved: dict | None = None,
+) -> tuple[str, Response | None]:
+    """
+    Resolves the ETag from the version row alone. Returns (etag, 304 response)
+    when the client is up to date, (etag, None) when the route must render.
+    """
+    etag = make_etag(user_id, await current_version(db, user_id), request, resolved)
+    if _matches(request, etag):
+        return etag, Response(status_code=304, headers=cache_headers(etag))
+    return etag, None
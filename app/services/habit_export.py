@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.habit import Habit, HabitLog
+
+EXPORT_CHUNK_ROWS = 2000
+CSV_COLUMNS = ["habit_id", "habit_name", "date", "completed", "sleep_hours"]
+
+
+def _export_query(user_id: int):
+    # habits without any log still show up once (LEFT JOIN)
+    return (
+        select(
+            Habit.id,
+            Habit.name,
+            HabitLog.date,
+            HabitLog.completed,
+            HabitLog.sleep_hours,
+        )
+        .outerjoin(HabitLog, HabitLog.habit_id == Habit.id)
+        .where(Habit.user_id == user_id)
+        .order_by(Habit.id, HabitLog.date)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+
+
+def _encode_csv(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for habit_id, name, day, completed, sleep_hours in rows:
+        writer.writerow(
+            [
+                habit_id,
+                name,
+                day.isoformat() if day else "",
+                "" if completed is None else str(completed).lower(),
+                "" if sleep_hours is None else sleep_hours,
+            ]
+        )
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows, last_habit_id) -> tuple[str, int | None]:
+    # {"type": "habit", ...} line first, then that habit's {"type": "log", ...}
+    lines = []
+    for habit_id, name, day, completed, sleep_hours in rows:
+        if habit_id != last_habit_id:
+            lines.append(json.dumps({"type": "habit", "id": habit_id, "name": name}))
+            last_habit_id = habit_id
+        if day is not None:
+            lines.append(
+                json.dumps(
+                    {
+                        "type": "log",
+                        "habit_id": habit_id,
+                        "date": day.isoformat(),
+                        "completed": bool(completed),
+                        "sleep_hours": sleep_hours,
+                    }
+                )
+            )
+    return "".join(line + "\n" for line in lines), last_habit_id
+
+
+async def export_habits(user_id: int, fmt: str, gzip: bool):
+    """Async byte chunks; at most one cursor partition is held in memory."""
+    compressor = zlib.compressobj(wbits=31) if gzip else None   # 31 = gzip container
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    # own session: the request's session is gone once the body streams
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(_export_query(user_id))
+
+        first = True
+        last_habit_id = None
+        async for rows in result.partitions():
+            if fmt == "csv":
+                chunk = _encode_csv(rows, header=first)
+            else:
+                chunk, last_habit_id = _encode_ndjson(rows, last_habit_id)
+            first = False
+
+            data = emit(chunk)
+            if data:
+                yield data
+
+        if fmt == "csv" and first:
+            yield emit(_encode_csv([], header=True))
+
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,237 @@
+import csv
+import io
+import json
+import time
+from datetime import date
+from typing import AsyncIterator, List, Optional
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import log_hooks, data_version
+
+IMPORT_CHUNK_ROWS = 5000          # rows validated + COPY'd per batch
+IMPORT_MAX_LINE_BYTES = 64 * 1024
+IMPORT_MAX_ERRORS = 100           # errors echoed back to the client
+
+STAGING_TABLE = "habit_log_import_staging"
+STAGING_COLUMNS = ["seq", "habit_id", "date", "completed", "sleep_hours"]
+
+
+class HabitLogImportRow(BaseModel):
+    habit_id: int
+    date: date
+    completed: bool = True
+    sleep_hours: Optional[int] = None
+
+
+_rows_adapter = TypeAdapter(List[HabitLogImportRow])
+
+
+class HabitImportError(ValueError):
+    pass
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    # (1-based line number in the upload, line)
+    buffer = b""
+    line_no = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            raise HabitImportError(f"Line {line_no + len(lines) + 1} too long")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield line_no + 1, buffer.decode("utf-8").rstrip("\r")
+
+
+async def _iter_records(
+    stream: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[tuple[int, dict | str]]:
+    # yields (line number, dict) for parseable lines, (line number, raw
+    # string) for lines that aren't; blank lines and the CSV header are
+    # skipped but still counted
+    header = None
+    async for line_no, line in _iter_lines(stream):
+        if not line.strip():
+            continue
+
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_no, line
+                continue
+            yield line_no, (record if isinstance(record, dict) else line)
+            continue
+
+        values = next(csv.reader(io.StringIO(line)))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield line_no, line
+            continue
+        # empty CSV cells mean "not set": leave the key out so the model
+        # defaults apply (completed=True, sleep_hours=None)
+        yield line_no, {k: v for k, v in zip(header, values) if k and v != ""}
+
+
+class ImportReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.received = 0
+        self.valid = 0
+        self.invalid = 0
+        self.errors: list[dict] = []
+
+    def error(self, line_no: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+
+def _validate_chunk(records: list[tuple[int, dict | str]], report: ImportReport) -> list[tuple]:
+    parsed = [r for _, r in records if isinstance(r, dict)]
+
+    try:
+        rows = _rows_adapter.validate_python(parsed)
+        ok = dict(zip((id(r) for r in parsed), rows))
+    except ValidationError:
+        # fall back to per-row validation only for chunks that contain bad rows
+        ok = {}
+        for r in parsed:
+            try:
+                ok[id(r)] = HabitLogImportRow.model_validate(r)
+            except ValidationError as e:
+                ok[id(r)] = e
+
+    out = []
+    for line_no, record in records:
+        row = ok.get(id(record)) if isinstance(record, dict) else None
+
+        if row is None:
+            report.error(line_no, "Unparseable row")
+        elif isinstance(row, ValidationError):
+            report.error(line_no, row.errors()[0]["msg"])
+        else:
+            report.valid += 1
+            out.append((line_no, row.habit_id, row.date, row.completed, row.sleep_hours))
+    return out
+
+
+async def import_habit_logs(
+    db: AsyncSession,
+    user_id: int,
+    stream: AsyncIterator[bytes],
+    fmt: str,
+) -> dict:
+    report = ImportReport()
+
+    # Created through the session so its transaction is open first: the
+    # asyncpg adapter only BEGINs on the first statement it executes, and a
+    # request whose principal came from cache hasn't run one yet. Issued on
+    # the raw connection, ON COMMIT DROP would fire immediately in autocommit.
+    await db.execute(
+        text(
+            f"""
+            CREATE TEMP TABLE {STAGING_TABLE} (
+                seq integer NOT NULL,
+                habit_id integer NOT NULL,
+                date date NOT NULL,
+                completed boolean NOT NULL,
+                sleep_hours integer
+            ) ON COMMIT DROP
+            """
+        )
+    )
+
+    # COPY needs the driver connection; it joins the transaction opened above
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+
+    async def flush(records: list):
+        rows = _validate_chunk(records, report)
+        if rows:
+            await driver.copy_records_to_table(
+                STAGING_TABLE, records=rows, columns=STAGING_COLUMNS
+            )
+
+    chunk: list = []
+    async for line_no, record in _iter_records(stream, fmt):
+        report.received += 1
+        chunk.append((line_no, record))
+        if len(chunk) >= IMPORT_CHUNK_ROWS:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+
+    # Merge into habit_logs; only the caller's habits, last row wins per day
+    result = await db.execute(
+        text(
+            f"""
+            INSERT INTO habit_logs (user_id, habit_id, date, completed, sleep_hours)
+            SELECT DISTINCT ON (s.habit_id, s.date)
+                :user_id, s.habit_id, s.date, s.completed, s.sleep_hours
+            FROM {STAGING_TABLE} s
+            JOIN habits h ON h.id = s.habit_id AND h.user_id = :user_id
+            ORDER BY s.habit_id, s.date, s.seq DESC
+            ON CONFLICT ON CONSTRAINT unique_habit_day DO UPDATE
+            SET completed = EXCLUDED.completed,
+                sleep_hours = COALESCE(EXCLUDED.sleep_hours, habit_logs.sleep_hours)
+            """
+        ),
+        {"user_id": user_id},
+    )
+    merged = result.rowcount
+
+    not_owned = (
+        await db.execute(
+            text(
+                f"""
+                SELECT count(*) FROM {STAGING_TABLE} s
+                LEFT JOIN habits h ON h.id = s.habit_id AND h.user_id = :user_id
+                WHERE h.id IS NULL
+                """
+            ),
+            {"user_id": user_id},
+        )
+    ).scalar_one()
+
+    touched = (
+        await db.execute(
+            text(
+                f"""
+                SELECT s.habit_id, min(s.date), max(s.date) FROM {STAGING_TABLE} s
+                JOIN habits h ON h.id = s.habit_id AND h.user_id = :user_id
+                GROUP BY s.habit_id
+                """
+            ),
+            {"user_id": user_id},
+        )
+    ).all()
+    await log_hooks.after_bulk_write(
+        db, user_id, {habit_id: (first, last) for habit_id, first, last in touched}
+    )
+    if touched:
+        await db.execute(data_version.bump_statement(user_id))
+
+    await db.commit()
+
+    elapsed = time.perf_counter() - report.started
+    return {
+        "rows_received": report.received,
+        "rows_valid": report.valid,
+        "rows_invalid": report.invalid,
+        "rows_merged": merged,
+        "rows_skipped_unknown_habit": not_owned,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(report.received / elapsed, 1) if elapsed else None,
+        "errors": report.errors,
+    }
@@ -0,0 +1,106 @@
+import calendar
+from datetime import date
+
+import numpy as np
+
+from app.services.bitsets import BYTES_PER_YEAR
+
+# Vectorized statistics over habit_year_bits. Every function takes a
+# (habits × days) boolean matrix and works on all habits at once.
+
+
+def to_matrix(bits_by_habit: dict[int, bytes], habit_ids: list[int], year: int) -> np.ndarray:
+    days = 366 if calendar.isleap(year) else 365
+    empty = bytes(BYTES_PER_YEAR)
+    packed = np.frombuffer(
+        b"".join(bits_by_habit.get(h, empty) for h in habit_ids),
+        dtype=np.uint8,
+    ).reshape(len(habit_ids), BYTES_PER_YEAR)
+    return np.unpackbits(packed, axis=1, bitorder="little")[:, :days].astype(bool)
+
+
+def completion_rate(matrix: np.ndarray, days: int | None = None) -> np.ndarray:
+    days = matrix.shape[1] if days is None else days
+    if days <= 0:
+        return np.zeros(matrix.shape[0])
+    return matrix[:, :days].mean(axis=1)
+
+
+def rolling_rate(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Completion rate over each trailing `window` days, shape (habits, days - window + 1)."""
+    sums = np.cumsum(matrix, axis=1, dtype=np.int32)
+    sums = np.pad(sums, ((0, 0), (1, 0)))
+    return (sums[:, window:] - sums[:, :-window]) / window
+
+
+def _runs(matrix: np.ndarray):
+    # run boundaries per row: +1 where a run starts, -1 one past where it ends
+    edges = np.diff(
+        np.pad(matrix.astype(np.int8), ((0, 0), (1, 1))),
+        axis=1,
+    )
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)     # same row order as starts
+    return rows, starts, ends
+
+
+def longest_streak(matrix: np.ndarray) -> np.ndarray:
+    rows, starts, ends = _runs(matrix)
+    longest = np.zeros(matrix.shape[0], dtype=np.int32)
+    np.maximum.at(longest, rows, ends - starts)
+    return longest
+
+
+def current_streak(matrix: np.ndarray, today_index: int) -> np.ndarray:
+    """Run ending today (or yesterday, if today isn't checked yet)."""
+    rows, starts, ends = _runs(matrix[:, : today_index + 1])
+    current = np.zeros(matrix.shape[0], dtype=np.int32)
+    # a run is live if it ends at today or yesterday
+    live = ends >= today_index
+    current[rows[live]] = ends[live] - starts[live]
+    return current
+
+
+def year_summary(
+    bits_by_habit: dict[int, bytes],
+    habit_ids: list[int],
+    year: int,
+    today: date | None = None,
+) -> list[dict]:
+    today = today or date.today()
+    matrix = to_matrix(bits_by_habit, habit_ids, year)
+
+    if year < today.year:
+        elapsed = matrix.shape[1]
+    elif year > today.year:
+        elapsed = 0
+    else:
+        elapsed = today.timetuple().tm_yday
+
+    rates = completion_rate(matrix, elapsed)
+    longest = longest_streak(matrix)
+    current = (
+        current_streak(matrix, elapsed - 1)
+        if year == today.year
+        else np.zeros(len(habit_ids), dtype=np.int32)
+    )
+
+    window_rates = {}
+    for window in (7, 30):
+        if elapsed >= window:
+            window_rates[window] = rolling_rate(matrix[:, :elapsed], window)[:, -1]
+        else:
+            window_rates[window] = completion_rate(matrix, elapsed)
+
+    return [
+        {
+            "habit_id": habit_id,
+            "completed_days": int(matrix[i, :elapsed].sum()),
+            "completion_rate": round(float(rates[i]), 4),
+            "last_7_days_rate": round(float(window_rates[7][i]), 4),
+            "last_30_days_rate": round(float(window_rates[30][i]), 4),
+            "longest_streak": int(longest[i]),
+            "current_streak": int(current[i]),   # counted within the year
+        }
+        for i, habit_id in enumerate(habit_ids)
+    ]
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, or_, and_
+
+from app.database import AsyncSessionLocal
+from app.models.otp_code import OTPCode
+from app.models.refresh_token import RefreshToken
+from app.models.outbound_email import OutboundEmail
+
+# =======================
+# JANITOR CONFIG
+# =======================
+# Each batch is its own short transaction deleting at most JANITOR_BATCH_SIZE
+# rows, so the janitor never holds row locks for long and never competes with
+# logins for more than a few milliseconds at a time.
+
+JANITOR_ENABLED = os.getenv("JANITOR_ENABLED", "1") == "1"
+JANITOR_INTERVAL_SECONDS = float(os.getenv("JANITOR_INTERVAL_SECONDS", "300"))
+JANITOR_BATCH_SIZE = int(os.getenv("JANITOR_BATCH_SIZE", "500"))
+JANITOR_MAX_BATCHES = int(os.getenv("JANITOR_MAX_BATCHES", "200"))      # per table per run
+JANITOR_BATCH_PAUSE = float(os.getenv("JANITOR_BATCH_PAUSE", "0.05"))   # seconds
+
+# Revoked refresh tokens are what reuse detection matches against, so they are
+# kept for a while after being issued instead of being dropped right away.
+# Unrevoked tokens live until expires_at (REFRESH_TOKEN_EXPIRE_DAYS = 7 days),
+# so this must stay well below that or the revoked branch never fires first;
+# a token replayed after it is simply unknown (401) rather than flagged reuse.
+REVOKED_TOKEN_RETENTION_HOURS = float(os.getenv("REVOKED_TOKEN_RETENTION_HOURS", "24"))
+
+# Dead letters (recipient, template and error only) stay around long enough
+# for an admin to look at them.
+DEAD_MAIL_RETENTION_HOURS = float(os.getenv("DEAD_MAIL_RETENTION_HOURS", "72"))
+
+
+def _otp_condition(now: datetime):
+    # used or expired codes can never verify again
+    return or_(OTPCode.verified == True, OTPCode.expires_at < now)
+
+
+def _refresh_token_condition(now: datetime):
+    grace = now - timedelta(hours=REVOKED_TOKEN_RETENTION_HOURS)
+    return or_(
+        RefreshToken.expires_at < now,
+        and_(RefreshToken.revoked == True, RefreshToken.created_at < grace),
+    )
+
+
+def _dead_mail_condition(now: datetime):
+    grace = now - timedelta(hours=DEAD_MAIL_RETENTION_HOURS)
+    return and_(OutboundEmail.status == "dead", OutboundEmail.created_at < grace)
+
+
+# table name -> (model, condition factory)
+TARGETS = {
+    "otp_codes": (OTPCode, _otp_condition),
+    "refresh_tokens": (RefreshToken, _refresh_token_condition),
+    "outbound_emails": (OutboundEmail, _dead_mail_condition),
+}
+
+
+def purge_statement(model, condition, batch_size: int):
+    """
+    DELETE ... WHERE id IN (SELECT id ... LIMIT n FOR UPDATE SKIP LOCKED).
+    Rows a request currently holds are skipped and picked up next run.
+    """
+    ids = (
+        select(model.id)
+        .where(condition)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        delete(model)
+        .where(model.id.in_(ids.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    )
+
+
+class Janitor:
+    def __init__(self, interval: float, batch_size: int, max_batches: int, pause: float):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.pause = pause
+        self._task: asyncio.Task | None = None
+        self._run_lock = asyncio.Lock()
+        self._stats_lock = threading.Lock()
+        self.runs = 0
+        self.last_run_at: str | None = None
+        self.last_run_ms = 0.0
+        self.tables = {
+            name: {
+                "purged_total": 0,
+                "purged_last_run": 0,
+                "batches_total": 0,
+                "errors": 0,
+                "last_error": None,
+            }
+            for name in TARGETS
+        }
+
+    async def _purge_table(self, name: str, now: datetime) -> int:
+        model, condition = TARGETS[name]
+        stmt = purge_statement(model, condition(now), self.batch_size)
+        purged = 0
+        batches = 0
+
+        while batches < self.max_batches:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(stmt)
+                await db.commit()
+            batches += 1
+            purged += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+            await asyncio.sleep(self.pause)
+
+        with self._stats_lock:
+            table = self.tables[name]
+            table["purged_total"] += purged
+            table["purged_last_run"] = purged
+            table["batches_total"] += batches
+        return purged
+
+    async def run_once(self) -> dict:
+        """One pass over every table. Concurrent callers wait for the running pass."""
+        async with self._run_lock:
+            started = time.perf_counter()
+            now = datetime.utcnow()
+            purged = {}
+
+            for name in TARGETS:
+                try:
+                    purged[name] = await self._purge_table(name, now)
+                except Exception as exc:
+                    with self._stats_lock:
+                        self.tables[name]["errors"] += 1
+                        self.tables[name]["last_error"] = repr(exc)
+                    purged[name] = None
+
+            with self._stats_lock:
+                self.runs += 1
+                self.last_run_at = now.isoformat()
+                self.last_run_ms = round((time.perf_counter() - started) * 1000, 2)
+
+            return {"purged": purged, "duration_ms": self.last_run_ms}
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "enabled": JANITOR_ENABLED,
+                "running": self._task is not None and not self._task.done(),
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+                "max_batches": self.max_batches,
+                "revoked_token_retention_hours": REVOKED_TOKEN_RETENTION_HOURS,
+                "dead_mail_retention_hours": DEAD_MAIL_RETENTION_HOURS,
+                "runs": self.runs,
+                "last_run_at": self.last_run_at,
+                "last_run_ms": self.last_run_ms,
+                "tables": {name: dict(table) for name, table in self.tables.items()},
+            }
+
+
+janitor = Janitor(
+    interval=JANITOR_INTERVAL_SECONDS,
+    batch_size=JANITOR_BATCH_SIZE,
+    max_batches=JANITOR_MAX_BATCHES,
+    pause=JANITOR_BATCH_PAUSE,
+)
+
+
+if __name__ == "__main__":
+    # python -m app.services.janitor purge [--batch-size N]
+    parser = argparse.ArgumentParser(description="Expired OTP / refresh token / dead mail cleanup")
+    parser.add_argument("command", choices=["purge"])
+    parser.add_argument("--batch-size", type=int, default=JANITOR_BATCH_SIZE)
+    args = parser.parse_args()
+
+    janitor.batch_size = args.batch_size
+    result = asyncio.run(janitor.run_once())
+    for name, count in result["purged"].items():
+        print(f"✅ {name}: purged {count} rows")
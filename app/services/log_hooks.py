@@ -0,0 +1,41 @@
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import streaks, rollups, bitsets
+
+# Every writer of habit_logs calls one of these before committing, so the
+# derived tables (streaks, monthly rollups, completion bitsets) stay in the
+# same transaction.
+
+
+async def after_toggle(
+    db: AsyncSession,
+    user_id: int,
+    habit_id: int,
+    day: date,
+    completed: bool,
+):
+    await streaks.apply_toggle(db, habit_id, user_id, day, completed)
+    await rollups.refresh_month(db, user_id, habit_id, day)
+    await bitsets.set_day(db, user_id, habit_id, day, completed)
+
+
+async def after_bulk_write(
+    db: AsyncSession,
+    user_id: int,
+    ranges: dict[int, tuple[date, date]],
+):
+    """`ranges` maps each touched habit id to its (first, last) written day."""
+    await streaks.rebuild_for_habits(db, user_id, ranges.keys())
+    await rollups.refresh_ranges(db, user_id, ranges)
+    await bitsets.rebuild_ranges(db, user_id, ranges)
+
+
+def date_ranges(pairs) -> dict[int, tuple[date, date]]:
+    """{habit_id: (min day, max day)} for an iterable of (habit_id, day)."""
+    ranges: dict[int, tuple[date, date]] = {}
+    for habit_id, day in pairs:
+        first, last = ranges.get(habit_id, (day, day))
+        ranges[habit_id] = (min(first, day), max(last, day))
+    return ranges
@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, delete, func
+
+from app.database import AsyncSessionLocal
+from app.models.outbound_email import OutboundEmail
+from app.utils.email import EmailMessage, get_transport, render_email, seal_params
+
+# =======================
+# MAIL QUEUE CONFIG
+# =======================
+# Requests only insert a row (in the same transaction as whatever produced the
+# mail); MAIL_WORKERS background tasks claim batches with SKIP LOCKED, hand
+# them to one long-lived transport in a worker thread, and retry failures with
+# exponential backoff until MAIL_MAX_ATTEMPTS, after which the row is kept as
+# a dead letter.
+
+MAIL_QUEUE_ENABLED = os.getenv("MAIL_QUEUE_ENABLED", "1") == "1"
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", "2"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "20"))
+MAIL_POLL_INTERVAL = float(os.getenv("MAIL_POLL_INTERVAL", "1"))       # seconds
+MAIL_LEASE_SECONDS = float(os.getenv("MAIL_LEASE_SECONDS", "60"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_BACKOFF_BASE = float(os.getenv("MAIL_BACKOFF_BASE", "5"))         # seconds
+MAIL_BACKOFF_MAX = float(os.getenv("MAIL_BACKOFF_MAX", "600"))         # seconds
+
+PENDING = "pending"
+DEAD = "dead"
+
+
+def enqueue_email(
+    db,
+    to_email: str,
+    template: str,
+    params: dict,
+    expires_at: datetime | None = None,
+) -> OutboundEmail:
+    """
+    Queue a mail by template id and render parameters. The parameters are
+    stored encrypted. Works with both Session and AsyncSession; the caller
+    commits and then calls mail_queue.notify().
+    """
+    row = OutboundEmail(
+        to_email=to_email,
+        template=template,
+        params=seal_params(params),
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+        expires_at=expires_at,
+    )
+    db.add(row)
+    return row
+
+
+def backoff_delay(attempts: int) -> float:
+    # full jitter on the upper half so retries from one outage spread out
+    delay = min(MAIL_BACKOFF_MAX, MAIL_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _claim_statement(now: datetime, batch_size: int):
+    ids = (
+        select(OutboundEmail.id)
+        .where(
+            OutboundEmail.status == PENDING,
+            OutboundEmail.next_attempt_at <= now,
+        )
+        .order_by(OutboundEmail.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(OutboundEmail)
+        .where(OutboundEmail.id.in_(ids.scalar_subquery()))
+        .values(
+            attempts=OutboundEmail.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=MAIL_LEASE_SECONDS),
+        )
+        .returning(
+            OutboundEmail.id,
+            OutboundEmail.to_email,
+            OutboundEmail.template,
+            OutboundEmail.params,
+            OutboundEmail.attempts,
+            OutboundEmail.expires_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+class MailQueue:
+    def __init__(self, workers: int, batch_size: int, poll_interval: float):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.transport = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.sent = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+        self.expired = 0
+        self.send_ms_total = 0.0
+        self.send_ms_max = 0.0
+        self.last_error: str | None = None
+
+    # -------- lifecycle --------
+
+    def configure(self, transport=None):
+        """Build the transport now, so a missing MAIL_TRANSPORT fails startup."""
+        self.transport = transport or self.transport or get_transport()
+
+    def start(self, transport=None):
+        if self._tasks:
+            return
+        self.configure(transport)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            self._loop.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def notify(self):
+        """Wake the workers after a commit; safe to call from any thread."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    # -------- processing --------
+
+    async def process_batch(self) -> int:
+        """Claim, send and settle one batch. Returns the number of rows claimed."""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(_claim_statement(now, self.batch_size))).all()
+            await db.commit()
+
+        if not rows:
+            return 0
+
+        expired = [r for r in rows if r.expires_at is not None and r.expires_at <= now]
+        live = [r for r in rows if r.expires_at is None or r.expires_at > now]
+
+        # a row that can't be rendered will never succeed: dead-letter it now
+        unrenderable = {}
+        messages = []
+        for r in live:
+            try:
+                subject, html_content = render_email(r.template, r.params)
+            except Exception as e:
+                unrenderable[r.id] = repr(e)
+                continue
+            messages.append(EmailMessage(r.id, r.to_email, subject, html_content))
+
+        failed = {}
+        if messages:
+            started = time.perf_counter()
+            try:
+                failed = await asyncio.to_thread(self.transport.send_batch, messages)
+            except Exception as e:
+                failed = {m.id: repr(e) for m in messages}
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.send_ms_total += elapsed_ms
+                self.send_ms_max = max(self.send_ms_max, elapsed_ms)
+
+        sent_ids = [m.id for m in messages if m.id not in failed]
+        # dead letters keep recipient, template and error, never the params
+        settled = [
+            {"id": r.id, "status": DEAD, "params": None, "last_error": "expired before delivery"}
+            for r in expired
+        ]
+        settled += [
+            {"id": row_id, "status": DEAD, "params": None, "last_error": error}
+            for row_id, error in unrenderable.items()
+        ]
+        dead = len(unrenderable)
+        for r in live:
+            if r.id not in failed:
+                continue
+            if r.attempts >= MAIL_MAX_ATTEMPTS:
+                dead += 1
+                settled.append(
+                    {"id": r.id, "status": DEAD, "params": None, "last_error": failed[r.id]}
+                )
+            else:
+                settled.append(
+                    {
+                        "id": r.id,
+                        "last_error": failed[r.id],
+                        "next_attempt_at": now + timedelta(seconds=backoff_delay(r.attempts)),
+                    }
+                )
+
+        async with AsyncSessionLocal() as db:
+            if sent_ids:
+                await db.execute(
+                    delete(OutboundEmail)
+                    .where(OutboundEmail.id.in_(sent_ids))
+                    .execution_options(synchronize_session=False)
+                )
+            for values in settled:
+                await db.execute(
+                    update(OutboundEmail)
+                    .where(OutboundEmail.id == values.pop("id"))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+        with self._lock:
+            self.batches += 1
+            self.sent += len(sent_ids)
+            self.failed_attempts += len(failed)
+            self.dead_lettered += dead + len(expired)
+            self.expired += len(expired)
+            if failed:
+                self.last_error = next(iter(failed.values()))
+
+        return len(rows)
+
+    async def drain(self) -> int:
+        """Process batches until nothing is due. Returns rows claimed."""
+        total = 0
+        while claimed := await self.process_batch():
+            total += claimed
+        return total
+
+    async def _worker(self):
+        while True:
+            try:
+                claimed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # database hiccup: note it and fall back to polling
+                with self._lock:
+                    self.last_error = repr(e)
+                claimed = 0
+
+            if claimed:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # -------- introspection --------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": MAIL_QUEUE_ENABLED,
+                "running": any(not t.done() for t in self._tasks),
+                "transport": getattr(self.transport, "name", None),
+                "workers": self.workers,
+                "batch_size": self.batch_size,
+                "max_attempts": MAIL_MAX_ATTEMPTS,
+                "batches": self.batches,
+                "sent": self.sent,
+                "failed_attempts": self.failed_attempts,
+                "dead_lettered": self.dead_lettered,
+                "expired": self.expired,
+                "send_ms_avg": round(self.send_ms_total / self.batches, 2) if self.batches else 0.0,
+                "send_ms_max": round(self.send_ms_max, 2),
+                "last_error": self.last_error,
+            }
+
+
+async def queue_depth(db) -> dict:
+    rows = await db.execute(
+        select(OutboundEmail.status, func.count()).group_by(OutboundEmail.status)
+    )
+    depth = {PENDING: 0, DEAD: 0}
+    depth.update({status: count for status, count in rows.all()})
+    return depth
+
+
+mail_queue = MailQueue(
+    workers=MAIL_WORKERS,
+    batch_size=MAIL_BATCH_SIZE,
+    poll_interval=MAIL_POLL_INTERVAL,
+)
+
+
+if __name__ == "__main__":
+    # python -m app.services.mail_queue drain|run [--transport file|stdout|sendgrid]
+    # `run` is for deployments that set MAIL_QUEUE_ENABLED=0 on the API workers
+    parser = argparse.ArgumentParser(description="Outbound mail queue")
+    parser.add_argument("command", choices=["drain", "run"])
+    parser.add_argument("--transport", default=None)
+    args = parser.parse_args()
+
+    transport = get_transport(args.transport) if args.transport else get_transport()
+
+    async def main():
+        if args.command == "drain":
+            mail_queue.transport = transport
+            count = await mail_queue.drain()
+            print(f"✅ Processed {count} queued mails")
+            return
+        mail_queue.start(transport)
+        await asyncio.gather(*mail_queue._tasks)
+
+    asyncio.run(main())
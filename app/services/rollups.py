@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import calendar
+from datetime import date
+
+from sqlalchemy import select, func, extract, and_, or_, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import upsert
+from app.models.habit import Habit, HabitLog, HabitMonthStat
+
+_ROLLUP_COLUMNS = [
+    "user_id",
+    "habit_id",
+    "year",
+    "month",
+    "completed_count",
+    "logged_days",
+    "sleep_hours_sum",
+]
+
+
+def _month_bounds(first: date, last: date) -> tuple[date, date]:
+    # [first day of first's month, first day of the month after last)
+    start = first.replace(day=1)
+    end = date(last.year + 1, 1, 1) if last.month == 12 else date(last.year, last.month + 1, 1)
+    return start, end
+
+
+async def _upsert_from_logs(db: AsyncSession, condition):
+    year = extract("year", HabitLog.date).cast(Integer)
+    month = extract("month", HabitLog.date).cast(Integer)
+
+    aggregate = (
+        select(
+            HabitLog.user_id,
+            HabitLog.habit_id,
+            year,
+            month,
+            func.count().filter(HabitLog.completed == True),
+            func.count(),
+            func.coalesce(func.sum(HabitLog.sleep_hours), 0),
+        )
+        .where(condition)
+        .group_by(HabitLog.user_id, HabitLog.habit_id, year, month)
+    )
+
+    stmt = upsert(HabitMonthStat).from_select(_ROLLUP_COLUMNS, aggregate)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "habit_id", "year", "month"],
+            set_={
+                "completed_count": stmt.excluded.completed_count,
+                "logged_days": stmt.excluded.logged_days,
+                "sleep_hours_sum": stmt.excluded.sleep_hours_sum,
+            },
+        )
+    )
+
+
+async def refresh_ranges(
+    db: AsyncSession,
+    user_id: int,
+    ranges: dict[int, tuple[date, date]],
+):
+    """
+    Recompute the rollup rows for every month touched by `ranges`
+    ({habit_id: (first_day, last_day)}). Each month is at most 31 log rows,
+    read through idx_habit_month.
+    """
+    if not ranges:
+        return
+
+    windows = []
+    for habit_id, (first, last) in ranges.items():
+        start, end = _month_bounds(first, last)
+        windows.append(
+            and_(
+                HabitLog.habit_id == habit_id,
+                HabitLog.date >= start,
+                HabitLog.date < end,
+            )
+        )
+
+    await _upsert_from_logs(db, and_(HabitLog.user_id == user_id, or_(*windows)))
+
+
+async def refresh_month(db: AsyncSession, user_id: int, habit_id: int, day: date):
+    await refresh_ranges(db, user_id, {habit_id: (day, day)})
+
+
+# =========================
+# QUERY API
+# =========================
+
+def _last_months(today: date, months: int) -> list[tuple[int, int]]:
+    keys = []
+    year, month = today.year, today.month
+    for _ in range(months):
+        keys.append((year, month))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return list(reversed(keys))
+
+
+async def completion_by_month(
+    db: AsyncSession,
+    user_id: int,
+    months: int = 12,
+    today: date | None = None,
+):
+    """Completion % per habit for the last `months` months (≤ months × #habits rows)."""
+    today = today or date.today()
+    keys = _last_months(today, months)
+    first_year, first_month = keys[0]
+
+    habits = (
+        await db.execute(
+            select(Habit.id, Habit.name)
+            .where(Habit.user_id == user_id)
+            .order_by(Habit.id)
+        )
+    ).all()
+
+    rows = await db.execute(
+        select(HabitMonthStat).where(
+            HabitMonthStat.user_id == user_id,
+            HabitMonthStat.year * 12 + HabitMonthStat.month
+            >= first_year * 12 + first_month,
+        )
+    )
+    stats = {(r.habit_id, r.year, r.month): r for r in rows.scalars()}
+
+    result = []
+    for habit_id, name in habits:
+        series = []
+        for year, month in keys:
+            stat = stats.get((habit_id, year, month))
+            # the running month only counts the days elapsed so far
+            days = (
+                today.day
+                if (year, month) == (today.year, today.month)
+                else calendar.monthrange(year, month)[1]
+            )
+            completed = stat.completed_count if stat else 0
+            series.append(
+                {
+                    "year": year,
+                    "month": month,
+                    "completed": completed,
+                    "logged_days": stat.logged_days if stat else 0,
+                    "sleep_hours_sum": stat.sleep_hours_sum if stat else 0,
+                    "completion_rate": round(completed / days, 4),
+                }
+            )
+        result.append({"habit_id": habit_id, "name": name, "months": series})
+
+    return result
+
+
+# =========================
+# REBUILD
+# =========================
+
+async def rebuild_all(batch_size: int = 500, user_id: int | None = None) -> int:
+    from app.database import AsyncSessionLocal
+
+    rebuilt = 0
+    after_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = (
+                select(Habit.id)
+                .where(Habit.id > after_id)
+                .order_by(Habit.id)
+                .limit(batch_size)
+            )
+            if user_id is not None:
+                query = query.where(Habit.user_id == user_id)
+
+            habit_ids = (await db.execute(query)).scalars().all()
+            if not habit_ids:
+                return rebuilt
+
+            await _upsert_from_logs(db, HabitLog.habit_id.in_(habit_ids))
+            await db.commit()
+
+            rebuilt += len(habit_ids)
+            after_id = habit_ids[-1]
+
+
+if __name__ == "__main__":
+    # python -m app.services.rollups rebuild [--user-id N] [--batch-size N]
+    parser = argparse.ArgumentParser(description="Habit monthly rollup maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    count = asyncio.run(rebuild_all(args.batch_size, args.user_id))
+    print(f"✅ Rebuilt monthly rollups for {count} habits")
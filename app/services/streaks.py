@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import upsert
+from app.models.habit import Habit, HabitLog, HabitStreak
+
+ONE_DAY = timedelta(days=1)
+
+
+# =========================
+# PURE STREAK MATH
+# =========================
+
+def streaks_from_dates(dates: Iterable[date]) -> tuple[int, int, date | None]:
+    """(current, longest, last) for ascending completed dates."""
+    current = longest = 0
+    last = None
+    for day in dates:
+        if last is not None and day == last + ONE_DAY:
+            current += 1
+        elif day != last:
+            current = 1
+        longest = max(longest, current)
+        last = day
+    return current, longest, last
+
+
+def apply_change(
+    current: int,
+    longest: int,
+    last: date | None,
+    day: date,
+    completed: bool,
+) -> tuple[int, int, date | None] | None:
+    """
+    New (current, longest, last) after `day` became completed / not completed,
+    or None when the change can't be resolved from the summary alone
+    (bridging two runs, or possibly shrinking the longest run).
+    """
+    run_start = last - timedelta(days=current - 1) if last else None
+
+    if completed:
+        if last is None or day > last + ONE_DAY:
+            return 1, max(longest, 1), day
+        if day == last + ONE_DAY:
+            return current + 1, max(longest, current + 1), day
+        if run_start <= day <= last:
+            return current, longest, last     # already counted
+        return None                           # may join an older run
+
+    if last is None or day > last:
+        return current, longest, last         # nothing completed there
+    if day < run_start or longest == current:
+        return None
+    if day == last:
+        if current == 1:
+            return None                       # need the previous run
+        return current - 1, longest, last - ONE_DAY
+    # un-toggled in the middle of the current run: keep the tail
+    return (last - day).days, longest, last
+
+
+def effective_current(current: int, last: date | None, today: date) -> int:
+    # a run only counts as "current" while today or yesterday is completed
+    if last is None or last < today - ONE_DAY:
+        return 0
+    return current
+
+
+# =========================
+# PERSISTENCE
+# =========================
+
+async def _lock_streak(db: AsyncSession, habit_id: int, user_id: int) -> HabitStreak:
+    # create-if-missing and row-lock in one statement; serializes
+    # concurrent updates to the same habit's streak
+    stmt = upsert(HabitStreak).values(
+        habit_id=habit_id,
+        user_id=user_id,
+        current_streak=0,
+        longest_streak=0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[HabitStreak.habit_id],
+        set_={"habit_id": stmt.excluded.habit_id},
+    ).returning(HabitStreak)
+
+    result = await db.scalars(stmt, execution_options={"populate_existing": True})
+    return result.one()
+
+
+async def _completed_dates(db: AsyncSession, habit_ids: list[int]):
+    result = await db.execute(
+        select(HabitLog.habit_id, HabitLog.date)
+        .where(HabitLog.habit_id.in_(habit_ids), HabitLog.completed == True)
+        .order_by(HabitLog.habit_id, HabitLog.date)
+    )
+    return result.all()
+
+
+async def apply_toggle(
+    db: AsyncSession,
+    habit_id: int,
+    user_id: int,
+    day: date,
+    completed: bool,
+):
+    streak = await _lock_streak(db, habit_id, user_id)
+
+    new = apply_change(
+        streak.current_streak,
+        streak.longest_streak,
+        streak.last_completed_date,
+        day,
+        completed,
+    )
+    if new is None:
+        rows = await _completed_dates(db, [habit_id])
+        new = streaks_from_dates(d for _, d in rows)
+
+    streak.current_streak, streak.longest_streak, streak.last_completed_date = new
+    await db.flush()
+
+
+async def rebuild_for_habits(db: AsyncSession, user_id: int, habit_ids: Iterable[int]):
+    """Full recompute for a set of one user's habits (bulk writers, backfill)."""
+    habit_ids = sorted(set(habit_ids))
+    if not habit_ids:
+        return
+
+    per_habit = {
+        habit_id: streaks_from_dates(d for _, d in rows)
+        for habit_id, rows in groupby(
+            await _completed_dates(db, habit_ids), key=lambda r: r[0]
+        )
+    }
+
+    values = []
+    for habit_id in habit_ids:
+        current, longest, last = per_habit.get(habit_id, (0, 0, None))
+        values.append(
+            {
+                "habit_id": habit_id,
+                "user_id": user_id,
+                "current_streak": current,
+                "longest_streak": longest,
+                "last_completed_date": last,
+            }
+        )
+
+    stmt = upsert(HabitStreak).values(values)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[HabitStreak.habit_id],
+            set_={
+                "current_streak": stmt.excluded.current_streak,
+                "longest_streak": stmt.excluded.longest_streak,
+                "last_completed_date": stmt.excluded.last_completed_date,
+            },
+        )
+    )
+
+
+async def get_streaks(db: AsyncSession, user_id: int, today: date | None = None):
+    today = today or date.today()
+
+    result = await db.execute(
+        select(
+            Habit.id,
+            Habit.name,
+            HabitStreak.current_streak,
+            HabitStreak.longest_streak,
+            HabitStreak.last_completed_date,
+        )
+        .outerjoin(HabitStreak, HabitStreak.habit_id == Habit.id)
+        .where(Habit.user_id == user_id)
+        .order_by(Habit.id)
+    )
+
+    return [
+        {
+            "habit_id": row.id,
+            "name": row.name,
+            "current_streak": effective_current(
+                row.current_streak or 0, row.last_completed_date, today
+            ),
+            "longest_streak": row.longest_streak or 0,
+            "last_completed_date": row.last_completed_date,
+        }
+        for row in result
+    ]
+
+
+# =========================
+# BACKFILL
+# =========================
+
+async def rebuild_all(batch_size: int = 500, user_id: int | None = None) -> int:
+    from app.database import AsyncSessionLocal
+
+    rebuilt = 0
+    after_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = (
+                select(Habit.id, Habit.user_id)
+                .where(Habit.id > after_id)
+                .order_by(Habit.id)
+                .limit(batch_size)
+            )
+            if user_id is not None:
+                query = query.where(Habit.user_id == user_id)
+
+            rows = (await db.execute(query)).all()
+            if not rows:
+                return rebuilt
+
+            by_user = {}
+            for habit_id, owner_id in rows:
+                by_user.setdefault(owner_id, []).append(habit_id)
+            for owner_id, habit_ids in by_user.items():
+                await rebuild_for_habits(db, owner_id, habit_ids)
+
+            await db.commit()
+            rebuilt += len(rows)
+            after_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    # python -m app.services.streaks rebuild [--user-id N] [--batch-size N]
+    parser = argparse.ArgumentParser(description="Habit streak maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    count = asyncio.run(rebuild_all(args.batch_size, args.user_id))
+    print(f"✅ Rebuilt streaks for {count} habits")
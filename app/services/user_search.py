@@ -0,0 +1,185 @@
+import os
+import threading
+
+from sqlalchemy import select, or_, func, text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models.user import User
+
+# =========================
+# BACKEND SELECTION
+# =========================
+# pg_trgm  -> GIN trigram indexes on users.name / users.email (Postgres);
+#            plain ILIKE until the pg_trgm extension exists
+# ngram    -> in-process trigram index, for SQLite / dev databases
+
+USER_SEARCH_BACKEND = os.getenv(
+    "USER_SEARCH_BACKEND",
+    "pg_trgm" if engine.dialect.name == "postgresql" else "ngram",
+)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# =========================
+# POSTGRES (pg_trgm)
+# =========================
+
+class TrigramSearch:
+    def __init__(self):
+        # only a positive answer is cached: until the schema bootstrap has
+        # created the extension, searches fall back to unranked ILIKE
+        self._has_trgm = False
+
+    @property
+    def name(self) -> str:
+        return "pg_trgm" if self._has_trgm else "ilike"
+
+    def _check_extension(self, db: Session) -> bool:
+        if not self._has_trgm:
+            self._has_trgm = bool(
+                db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+            )
+        return self._has_trgm
+
+    def search(self, db: Session, term: str, limit: int, offset: int):
+        pattern = f"%{_escape_like(term)}%"
+        # ILIKE '%term%' is served by the gin_trgm_ops indexes
+        query = db.query(User).filter(
+            or_(
+                User.name.ilike(pattern, escape="\\"),
+                User.email.ilike(pattern, escape="\\"),
+            )
+        )
+        if self._check_extension(db):
+            rank = func.greatest(
+                func.word_similarity(term, User.name),
+                func.word_similarity(term, func.coalesce(User.email, "")),
+            )
+            query = query.order_by(rank.desc(), User.id)
+        else:
+            query = query.order_by(User.id)
+        return query.offset(offset).limit(limit).all()
+
+    def user_saved(self, user_id: int, name: str | None, email: str | None):
+        pass
+
+    def user_deleted(self, user_id: int):
+        pass
+
+
+# =========================
+# IN-PROCESS N-GRAM INDEX
+# =========================
+
+class NgramSearch:
+    name = "ngram"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # single-flight for the initial load: searches run in the threadpool,
+        # so the first burst would otherwise read the users table once each
+        self._build_lock = threading.Lock()
+        self._loaded = False
+        self._docs: dict[int, tuple[str, str]] = {}
+        self._postings: dict[str, set[int]] = {}
+
+    def _add(self, user_id: int, name: str | None, email: str | None):
+        doc = ((name or "").lower(), (email or "").lower())
+        self._docs[user_id] = doc
+        for gram in _trigrams(doc[0]) | _trigrams(doc[1]):
+            self._postings.setdefault(gram, set()).add(user_id)
+
+    def _remove(self, user_id: int):
+        doc = self._docs.pop(user_id, None)
+        if doc is None:
+            return
+        for gram in _trigrams(doc[0]) | _trigrams(doc[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(user_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _ensure_loaded(self, db: Session):
+        if self._loaded:
+            return
+        with self._build_lock:
+            if self._loaded:
+                return
+            rows = db.execute(select(User.id, User.name, User.email)).all()
+            with self._lock:
+                for row in rows:
+                    self._add(row.id, row.name, row.email)
+                self._loaded = True
+
+    @staticmethod
+    def _score(term: str, doc: tuple[str, str]) -> float:
+        best = 0.0
+        for field in doc:
+            pos = field.find(term)
+            if pos < 0:
+                continue
+            # exact > prefix > substring; shorter fields rank higher
+            score = len(term) / len(field)
+            if pos == 0:
+                score += 1.0
+            if field == term:
+                score += 1.0
+            best = max(best, score)
+        return best
+
+    def search(self, db: Session, term: str, limit: int, offset: int):
+        self._ensure_loaded(db)
+        term = term.lower()
+
+        with self._lock:
+            grams = _trigrams(term)
+            if grams:
+                postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                candidates = set.intersection(*postings)
+            else:
+                candidates = self._docs.keys()   # 1-2 char terms: scan
+
+            scored = [
+                (score, user_id)
+                for user_id in candidates
+                if (score := self._score(term, self._docs[user_id])) > 0
+            ]
+
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        ids = [user_id for _, user_id in scored[offset:offset + limit]]
+        if not ids:
+            return []
+
+        users = {u.id: u for u in db.query(User).filter(User.id.in_(ids)).all()}
+        return [users[i] for i in ids if i in users]
+
+    def user_saved(self, user_id: int, name: str | None, email: str | None):
+        with self._lock:
+            if self._loaded:
+                self._remove(user_id)
+                self._add(user_id, name, email)
+
+    def user_deleted(self, user_id: int):
+        with self._lock:
+            if self._loaded:
+                self._remove(user_id)
+
+
+search_backend = TrigramSearch() if USER_SEARCH_BACKEND == "pg_trgm" else NgramSearch()
+
+
+def user_saved(user_id: int, name: str | None, email: str | None):
+    search_backend.user_saved(user_id, name, email)
+
+
+def user_deleted(user_id: int):
+    search_backend.user_deleted(user_id)
@@ -1,20 +1,179 @@
+import base64
+import hashlib
+import json
 import os
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from cryptography.fernet import Fernet, InvalidToken
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 FROM_EMAIL = os.getenv("FROM_EMAIL")
 
+# sendgrid | file | stdout. Required: file and stdout write whole mails,
+# OTP codes included, to disk / the logs, so they are local-dev only and
+# never picked implicitly.
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT")
+MAIL_FILE_PATH = os.getenv("MAIL_FILE_PATH", "outbound_mail.ndjson")
+
+# Queued render params (a live OTP for "otp" mails) are stored encrypted in
+# outbound_emails.params, so a database read alone never yields a usable
+# code. Any string works; it is stretched into a Fernet key.
+MAIL_PARAMS_KEY = os.getenv("MAIL_PARAMS_KEY", "dev-mail-params-secret")
+_params_cipher = Fernet(
+    base64.urlsafe_b64encode(hashlib.sha256(MAIL_PARAMS_KEY.encode("utf-8")).digest())
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EmailMessage:
+    id: int
+    to_email: str
+    subject: str
+    html_content: str
+
+
+def render_otp_email(otp: str) -> tuple[str, str]:
+    return (
+        "Your OTP Code",
+        f"""
+        <p>Your OTP code is:</p>
+        <h2>{otp}</h2>
+        <p>This code will expire in 5 minutes.</p>
+        """,
+    )
+
+
+# template id -> renderer(**params) -> (subject, html)
+TEMPLATES = {
+    "otp": render_otp_email,
+}
+
+
+def seal_params(params: dict) -> str:
+    return _params_cipher.encrypt(json.dumps(params).encode("utf-8")).decode("ascii")
+
+
+def open_params(sealed: str) -> dict:
+    try:
+        return json.loads(_params_cipher.decrypt(sealed.encode("ascii")))
+    except InvalidToken:
+        raise ValueError("Mail parameters can't be decrypted (MAIL_PARAMS_KEY changed?)")
+
+
+def render_email(template: str, sealed: str | None) -> tuple[str, str]:
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown mail template: {template}")
+    if sealed is None:
+        raise ValueError("Mail parameters were already purged")
+    return TEMPLATES[template](**open_params(sealed))
+
+
+# =======================
+# TRANSPORTS
+# =======================
+# send_batch() returns {message id: error} for the messages that failed; an
+# empty dict means everything was delivered. Transports are called from a
+# worker thread, never on the event loop.
+
+class SendGridTransport:
+    name = "sendgrid"
+
+    def __init__(self, api_key: str, from_email: str):
+        self.from_email = from_email
+        # one client for the life of the process instead of one per mail
+        self.client = SendGridAPIClient(api_key)
+
+    def send_batch(self, messages: list[EmailMessage]) -> dict[int, str]:
+        failed = {}
+        for message in messages:
+            try:
+                self.client.send(
+                    Mail(
+                        from_email=self.from_email,
+                        to_emails=message.to_email,
+                        subject=message.subject,
+                        html_content=message.html_content,
+                    )
+                )
+            except Exception as e:
+                failed[message.id] = repr(e)
+        return failed
+
+
+class FileTransport:
+    """Appends one JSON line per message; for local runs and tests."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _lines(self, messages: list[EmailMessage]) -> str:
+        sent_at = datetime.utcnow().isoformat()
+        return "".join(
+            json.dumps(
+                {
+                    "id": m.id,
+                    "to": m.to_email,
+                    "subject": m.subject,
+                    "html": m.html_content,
+                    "sent_at": sent_at,
+                }
+            )
+            + "\n"
+            for m in messages
+        )
+
+    def send_batch(self, messages: list[EmailMessage]) -> dict[int, str]:
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(self._lines(messages))
+        return {}
+
+
+class StdoutTransport(FileTransport):
+    name = "stdout"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages: list[EmailMessage]) -> dict[int, str]:
+        with self._lock:
+            sys.stdout.write(self._lines(messages))
+            sys.stdout.flush()
+        return {}
+
+
+def get_transport(name: str | None = MAIL_TRANSPORT):
+    """Build the configured transport; raises on missing configuration so startup fails fast."""
+    if name is None:
+        raise RuntimeError(
+            "MAIL_TRANSPORT is not set: use 'sendgrid', or 'file' / 'stdout' for local development"
+        )
+    if name == "sendgrid":
+        if not SENDGRID_API_KEY or not FROM_EMAIL:
+            raise RuntimeError("MAIL_TRANSPORT=sendgrid needs SENDGRID_API_KEY and FROM_EMAIL")
+        return SendGridTransport(SENDGRID_API_KEY, FROM_EMAIL)
+    if name == "file":
+        return FileTransport(MAIL_FILE_PATH)
+    if name == "stdout":
+        return StdoutTransport()
+    raise ValueError(f"Unknown MAIL_TRANSPORT: {name}")
+
+
 def send_otp_email(to_email: str, otp: str):
+    """Direct, blocking send. Request handlers enqueue through app/services/mail_queue instead."""
+    subject, html_content = render_otp_email(otp)
     message = Mail(
         from_email=FROM_EMAIL,
         to_emails=to_email,
-        subject="Your OTP Code",
-        html_content=f"""
-        <p>Your OTP code is:</p>
-        <h2>{otp}</h2>
-        <p>This code will expire in 5 minutes.</p>
-        """
+        subject=subject,
+        html_content=html_content,
     )
 
     try:
@@ -23,4 +182,3 @@ def send_otp_email(to_email: str, otp: str):
     except Exception as e:
         print("❌ Email sending failed:", e)
         raise
-
@@ -0,0 +1,26 @@
+import os
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+# Fast read path for list endpoints: rows are selected as plain column
+# tuples, validated in one TypeAdapter call over the whole list (TypedDict
+# rows, so no model instances are built) and encoded with orjson.
+# FAST_JSON_RESPONSES=0 falls back to ORM objects + response_model.
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "1") == "1"
+
+
+def rows_response(
+    adapter: TypeAdapter,
+    fields: tuple[str, ...],
+    rows,
+    headers: dict | None = None,
+) -> ORJSONResponse:
+    validated = adapter.validate_python([dict(zip(fields, row)) for row in rows])
+    return ORJSONResponse(validated, headers=headers)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
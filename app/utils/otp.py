@@ -1,16 +1,23 @@
-import random
-from passlib.context import CryptContext
+import hashlib
+import hmac
+import os
+import secrets
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Keyed digest instead of bcrypt: a 6-digit code has only 10^6 values, so a
+# slow hash buys nothing once the digest is secret-keyed, and the attempt
+# budget in app/core/otp_store is what actually stops guessing.
+OTP_HMAC_KEY = os.getenv("OTP_HMAC_KEY", "dev-otp-secret").encode("utf-8")
 
 
 def generate_otp() -> str:
-    return str(random.randint(100000, 999999))
+    return f"{secrets.randbelow(900000) + 100000}"
 
 
-def hash_otp(otp: str) -> str:
-    return pwd_context.hash(otp)
+def otp_digest(identifier: str, otp: str) -> str:
+    # binding the identifier means a digest is useless for any other account
+    message = f"{identifier}\x00{otp}".encode("utf-8")
+    return hmac.new(OTP_HMAC_KEY, message, hashlib.sha256).hexdigest()
 
 
-def verify_otp(plain_otp: str, hashed_otp: str) -> bool:
-    return pwd_context.verify(plain_otp, hashed_otp)
+def otp_matches(identifier: str, otp: str, digest: str) -> bool:
+    return hmac.compare_digest(otp_digest(identifier, otp), digest)
@@ -0,0 +1,105 @@
+"""
+Cost of the auth dependency alone: get_current_user() called directly with
+a warm principal cache, so no database and no HTTP stack is involved and
+what remains is token decoding.
+
+    python benchmarks/auth_dependency_bench.py --calls 20000 --tokens 200
+
+Configurations (app/core/jwt_backend.py, app/core/security.py):
+  jose            python-jose decode on every call (the old path)
+  fast            FastHS256Backend decode on every call
+  jose + cache    claims cache by token digest in front of jose
+  fast + cache    claims cache in front of FastHS256Backend (the default)
+
+Before timing, tokens minted by each backend are decoded by the other, and
+must be byte-identical, to confirm the backends are interchangeable.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core import security  # noqa: E402
+from app.core.cache import TTLCache  # noqa: E402
+from app.core.jwt_backend import FastHS256Backend, JoseBackend  # noqa: E402
+
+
+def check_parity(jose: JoseBackend, fast: FastHS256Backend):
+    claims = {"sub": "42", "exp": int(time.time()) + 600, "type": "refresh", "jti": "abc"}
+    token = jose.encode(dict(claims), "secret")
+    assert token == fast.encode(dict(claims), "secret")
+    assert jose.decode(token, "secret") == fast.decode(token, "secret") == claims
+
+    tampered = token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]
+    for backend in (jose, fast):
+        try:
+            backend.decode(tampered, "secret")
+        except security.JWTError:
+            pass
+        else:
+            raise AssertionError(f"{backend.name} accepted a tampered token")
+
+
+def configure(backend, cached: bool):
+    security.jwt_backend = backend
+    security.access_claims_cache = TTLCache(
+        maxsize=security.ACCESS_CLAIMS_CACHE_SIZE if cached else 0,
+        ttl=security.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
+def measure(calls: list[str]) -> list[float]:
+    async def run():
+        timings = []
+        for token in calls:
+            start = time.perf_counter()
+            await security.get_current_user(token=token, db=None)
+            timings.append((time.perf_counter() - start) * 1e6)
+        return timings
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    jose, fast = JoseBackend(), FastHS256Backend()
+    check_parity(jose, fast)
+
+    security.jwt_backend = jose
+    tokens = [security.create_access_token({"sub": str(i)}) for i in range(args.tokens)]
+    for i in range(args.tokens):
+        security.principal_cache.set(i, security.Principal(id=i, role="user", email=None), ttl=3600)
+
+    rng = random.Random(args.seed)
+    calls = [rng.choice(tokens) for _ in range(args.calls)]
+
+    print(f"{args.calls} get_current_user calls over {args.tokens} tokens (principal cache warm)")
+    results = {}
+    for label, backend, cached in [
+        ("jose", jose, False),
+        ("fast", fast, False),
+        ("jose + cache", jose, True),
+        ("fast + cache", fast, True),
+    ]:
+        configure(backend, cached)
+        measure(calls[:1000])  # warm up
+        timings = measure(calls)
+        q = statistics.quantiles(timings, n=100)
+        results[label] = q[49]
+        print(f"  {label:<13} p50 {q[49]:6.2f} µs   p99 {q[98]:6.2f} µs   mean {statistics.fmean(timings):6.2f} µs")
+
+    print(f"p50 speedup of fast + cache over jose: {results['jose'] / results['fast + cache']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Latency of Firebase ID token verification, fully offline: a throwaway RSA
+key signs the tokens and a local HTTP server plays Google's cert endpoint
+(Cache-Control: public, max-age=3600).
+
+    python benchmarks/firebase_verify_bench.py --calls 5000 --tokens 500
+
+before: what firebase_admin.auth.verify_id_token does per call, i.e.
+        google.oauth2.id_token.verify_token through a CacheControl-wrapped
+        requests session (HTTP cache lookup + RS256 verify every time)
+after:  app/core/firebase_tokens.FirebaseTokenVerifier with an
+        HttpCertKeySource on the same server (certs in memory for their
+        max-age, verified tokens memoized by digest until exp)
+
+`--tokens` distinct tokens are presented `--calls` times in random order,
+so most calls are retries of a token seen before, as with real clients.
+"""
+import argparse
+import datetime
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import cachecontrol  # noqa: E402
+import google.auth.transport.requests  # noqa: E402
+import google.oauth2.id_token  # noqa: E402
+import requests  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from google.auth import crypt, jwt as google_jwt  # noqa: E402
+
+from app.core.firebase_tokens import (  # noqa: E402
+    FIREBASE_ISSUER_PREFIX,
+    FirebaseTokenVerifier,
+    HttpCertKeySource,
+)
+
+PROJECT_ID = "bench-project"
+KID = "bench-key"
+
+
+def make_key_and_cert():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "bench")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def serve_certs(certs: dict) -> ThreadingHTTPServer:
+    body = json.dumps(certs).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "public, max-age=3600")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_tokens(key_pem: bytes, count: int) -> list[str]:
+    signer = crypt.RSASigner.from_string(key_pem, key_id=KID)
+    now = int(time.time())
+    return [
+        google_jwt.encode(
+            signer,
+            {
+                "iss": FIREBASE_ISSUER_PREFIX + PROJECT_ID,
+                "aud": PROJECT_ID,
+                "sub": f"user-{i}",
+                "phone_number": f"+1555{i:07d}",
+                "iat": now - 10,
+                "exp": now + 3600,
+                "auth_time": now - 10,
+            },
+        ).decode()
+        for i in range(count)
+    ]
+
+
+def measure(fn, calls: list[str]) -> list[float]:
+    timings = []
+    for token in calls:
+        start = time.perf_counter()
+        fn(token)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def summary(timings: list[float]) -> tuple[float, float]:
+    q = statistics.quantiles(timings, n=100)
+    return q[49], q[98]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    key_pem, cert_pem = make_key_and_cert()
+    server = serve_certs({KID: cert_pem})
+    certs_url = f"http://127.0.0.1:{server.server_port}/certs"
+
+    tokens = make_tokens(key_pem, args.tokens)
+    rng = random.Random(args.seed)
+    calls = [rng.choice(tokens) for _ in range(args.calls)]
+
+    session = cachecontrol.CacheControl(requests.Session())
+    request = google.auth.transport.requests.Request(session=session)
+
+    def before(token):
+        return google.oauth2.id_token.verify_token(
+            token, request=request, audience=PROJECT_ID, certs_url=certs_url
+        )
+
+    verifier = FirebaseTokenVerifier(
+        project_id=PROJECT_ID,
+        key_source=HttpCertKeySource(certs_url),
+    )
+
+    # warm both (first cert fetch), and check they agree
+    assert before(tokens[0])["sub"] == verifier.verify(tokens[0])["sub"]
+
+    before_p50, before_p99 = summary(measure(before, calls))
+    after_p50, after_p99 = summary(measure(verifier.verify, calls))
+    server.shutdown()
+
+    stats = verifier.stats()
+    print(f"{args.calls} verifications over {args.tokens} distinct tokens")
+    print(f"before (verify_token + CacheControl): p50 {before_p50:8.1f} µs   p99 {before_p99:8.1f} µs")
+    print(f"after  (FirebaseTokenVerifier):       p50 {after_p50:8.1f} µs   p99 {after_p99:8.1f} µs")
+    print(f"speedup: p50 {before_p50 / after_p50:.1f}x, p99 {before_p99 / after_p99:.1f}x; "
+          f"token cache hit rate {stats['tokens']['hit_rate']:.2%}, "
+          f"cert fetches {stats['certs']['fetches']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Row-based vs bitset/NumPy habit statistics, no database needed.
+
+    python benchmarks/habit_stats_bench.py --habits 20 --years 10
+
+The row path mimics what the API did before: one object per habit-day,
+Python loops for completion rate, 7-day window and longest streak.
+The bitset path packs each habit-year into 46 bytes and computes the same
+numbers with app/services/habit_stats.py.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.bitsets import pack_days  # noqa: E402
+from app.services import habit_stats  # noqa: E402
+
+
+def make_rows(habits: int, years: int, density: float):
+    start = date(2024 - years + 1, 1, 1)
+    rows = []
+    for habit_id in range(habits):
+        day = start
+        while day.year <= 2024:
+            if random.random() < density:
+                rows.append(SimpleNamespace(habit_id=habit_id, date=day, completed=True))
+            day += timedelta(days=1)
+    return rows
+
+
+def row_path(rows, habit_ids, year):
+    out = {}
+    for habit_id in habit_ids:
+        days = sorted(
+            r.date for r in rows if r.habit_id == habit_id and r.completed
+        )
+        longest = run = 0
+        prev = None
+        for d in days:
+            run = run + 1 if prev and d - prev == timedelta(days=1) else 1
+            longest = max(longest, run)
+            prev = d
+        last_week = {date(year, 12, 31) - timedelta(days=i) for i in range(7)}
+        out[habit_id] = (
+            len(days) / 366,
+            sum(d in last_week for d in days) / 7,
+            longest,
+        )
+    return out
+
+
+def bitset_path(bits_by_habit, habit_ids, year):
+    matrix = habit_stats.to_matrix(bits_by_habit, habit_ids, year)
+    return (
+        habit_stats.completion_rate(matrix),
+        habit_stats.rolling_rate(matrix, 7)[:, -1],
+        habit_stats.longest_streak(matrix),
+    )
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--density", type=float, default=0.7)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    rows = make_rows(args.habits, args.years, args.density)
+    habit_ids = list(range(args.habits))
+    year = 2024
+
+    bits = {
+        habit_id: pack_days(
+            r.date for r in rows if r.habit_id == habit_id and r.date.year == year
+        )
+        for habit_id in habit_ids
+    }
+
+    # the row path only sees the year, as a month/year query would return
+    year_rows = [r for r in rows if r.date.year == year]
+
+    expected = row_path(year_rows, habit_ids, year)
+    rates, weekly, longest = bitset_path(bits, habit_ids, year)
+    for i, habit_id in enumerate(habit_ids):
+        assert abs(expected[habit_id][0] - rates[i]) < 1e-9
+        assert abs(expected[habit_id][1] - weekly[i]) < 1e-9
+        assert expected[habit_id][2] == longest[i]
+
+    row_s = timed(lambda: row_path(year_rows, habit_ids, year), args.repeat)
+    bit_s = timed(lambda: bitset_path(bits, habit_ids, year), args.repeat)
+
+    print(f"{len(rows)} habit-day rows over {args.years} years, {args.habits} habits")
+    print(f"year {year}: {len(year_rows)} rows vs {len(bits) * 46} bytes of bitsets")
+    print(f"row path:    {row_s * 1000:8.2f} ms")
+    print(f"bitset path: {bit_s * 1000:8.2f} ms  ({row_s / bit_s:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
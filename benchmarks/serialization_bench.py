@@ -0,0 +1,100 @@
+"""
+Per-row cost of the list read paths, against an in-memory SQLite copy of
+the schema.
+
+    python benchmarks/serialization_bench.py --rows 20000
+
+before: ORM instances -> response_model validation -> stdlib json
+        (what FastAPI does for `return result.scalars().all()`)
+after:  column tuples -> one TypeAdapter over TypedDict rows -> orjson
+        (app/utils/fast_json.py)
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model)
+from app.database import Base  # noqa: E402
+from app.models.habit import HabitLog  # noqa: E402
+from app.routes.habit import HabitLogResponse, _habit_log_rows  # noqa: E402
+from app.utils.fast_json import rows_response  # noqa: E402
+
+FIELDS = ("habit_id", "date", "completed", "sleep_hours")
+response_model = TypeAdapter(List[HabitLogResponse])
+
+
+def before(Session):
+    with Session() as db:
+        logs = db.query(HabitLog).all()
+        validated = response_model.validate_python(logs, from_attributes=True)
+        return json.dumps(response_model.dump_python(validated, mode="json")).encode()
+
+
+def after(Session):
+    with Session() as db:
+        rows = db.execute(
+            select(HabitLog.habit_id, HabitLog.date, HabitLog.completed, HabitLog.sleep_hours)
+        ).all()
+        return rows_response(_habit_log_rows, FIELDS, rows).body
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        start = date(2000, 1, 1)
+        db.execute(
+            HabitLog.__table__.insert(),
+            [
+                {
+                    "user_id": 1,
+                    "habit_id": 1 + i % 10,
+                    "date": start + timedelta(days=i // 10),
+                    "completed": i % 3 != 0,
+                    "sleep_hours": 7 if i % 5 == 0 else None,
+                }
+                for i in range(args.rows)
+            ],
+        )
+        db.commit()
+
+    assert json.loads(before(Session)) == json.loads(after(Session))
+
+    before_s = timed(lambda: before(Session), args.repeat)
+    after_s = timed(lambda: after(Session), args.repeat)
+
+    per_row = lambda s: s / args.rows * 1e6  # noqa: E731
+    print(f"{args.rows} habit_log rows")
+    print(f"before (ORM + response_model + json): {per_row(before_s):6.2f} µs/row")
+    print(f"after  (tuples + TypeAdapter + orjson): {per_row(after_s):6.2f} µs/row"
+          f"  ({before_s / after_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Hammer one habit-day with concurrent toggles against a running server.
+
+    python benchmarks/toggle_concurrency.py --token <access token> --habit-id 1
+
+Every toggle must answer 200 (no unique-constraint 500s) and the final
+state must match the parity of the number of toggles sent. The same check
+runs in-process against SQLite in tests/test_toggle_concurrency.py; this
+script is for a real Postgres-backed server.
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+
+def request(base_url, token, method, path, body=None):
+    req = urllib.request.Request(
+        base_url + path,
+        method=method,
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        },
+    )
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def day_state(base_url, token, habit_id, day):
+    status, logs = request(
+        base_url, token, "GET", f"/habits/logs?year={day.year}&month={day.month}"
+    )
+    assert status == 200, f"GET /habits/logs answered {status}"
+    for log in logs:
+        if log["habit_id"] == habit_id and log["date"] == day.isoformat():
+            return log["completed"]
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--habit-id", type=int, required=True)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--toggles", type=int, default=501)
+    args = parser.parse_args()
+
+    before = day_state(args.base_url, args.token, args.habit_id, args.date)
+
+    def toggle(_):
+        return request(
+            args.base_url,
+            args.token,
+            "POST",
+            f"/habits/{args.habit_id}/toggle",
+            {"date": args.date.isoformat()},
+        )[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        statuses = Counter(pool.map(toggle, range(args.toggles)))
+    elapsed = time.perf_counter() - start
+
+    after = day_state(args.base_url, args.token, args.habit_id, args.date)
+    expected = before ^ (args.toggles % 2 == 1)
+
+    print(f"{args.toggles} toggles / {args.threads} threads in {elapsed:.2f}s "
+          f"({args.toggles / elapsed:.0f} req/s)")
+    print(f"status codes: {dict(statuses)}")
+    print(f"completed before={before} after={after} expected={expected}")
+
+    ok = statuses == Counter({200: args.toggles}) and after == expected
+    print("OK" if ok else "FAILED")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+# Configure the app for a throwaway SQLite database before anything under
+# app/ is imported (engines and module-level settings read these once).
+_TMP = tempfile.mkdtemp(prefix="habit_tracker_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/test.db")
+os.environ.setdefault("MAIL_TRANSPORT", "file")
+os.environ.setdefault("MAIL_FILE_PATH", f"{_TMP}/outbound_mail.ndjson")
+os.environ.setdefault("MAIL_QUEUE_ENABLED", "0")
+os.environ.setdefault("JANITOR_ENABLED", "0")
+os.environ.setdefault("RATE_LIMIT_STORE", "memory")
+os.environ.setdefault("RATE_LIMIT_SQLITE_PATH", f"{_TMP}/rate_limit.sqlite3")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def database():
+    from app.core import migrations, startup  # noqa: F401  (registers every model)
+    from app.database import engine
+
+    with engine.begin() as conn:
+        migrations.bootstrap(conn)
+    return engine
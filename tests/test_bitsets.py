@@ -0,0 +1,41 @@
+import asyncio
+from datetime import date
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.habit import Habit, HabitLog, HabitYearBits
+from app.models.user import User
+from app.services import bitsets
+
+
+def test_rebuild_ranges_writes_every_chunk(database, monkeypatch):
+    with SessionLocal() as db:
+        user = User(name="packer", email="packer@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        habits = [Habit(name=f"h{n}", user_id=user.id) for n in range(3)]
+        db.add_all(habits)
+        db.flush()
+        db.add_all(
+            HabitLog(user_id=user.id, habit_id=h.id, date=date(2020 + n, 3, 1), completed=True)
+            for n, h in enumerate(habits)
+        )
+        db.commit()
+        user_id, habit_ids = user.id, [h.id for h in habits]
+
+    # 3 habits x 5 years = 15 rows, written 4 at a time
+    monkeypatch.setattr(bitsets, "REBUILD_CHUNK", 4)
+    ranges = {habit_id: (date(2020, 1, 1), date(2024, 12, 31)) for habit_id in habit_ids}
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await bitsets.rebuild_ranges(db, user_id, ranges)
+            await db.commit()
+
+    asyncio.run(run())
+
+    with SessionLocal() as db:
+        rows = db.query(HabitYearBits).filter(HabitYearBits.user_id == user_id).all()
+        assert len(rows) == 15
+        for row in rows:
+            n = habit_ids.index(row.habit_id)
+            assert bitsets.is_set(row.bits, date(row.year, 3, 1)) == (row.year == 2020 + n)
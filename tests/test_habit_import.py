@@ -0,0 +1,63 @@
+import asyncio
+from datetime import date
+
+from app.services.habit_import import ImportReport, _iter_records, _validate_chunk
+
+
+async def _stream(data: bytes, size: int = 7):
+    # small chunks so lines straddle chunk boundaries
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _validate(data: bytes, fmt: str):
+    async def collect():
+        return [r async for r in _iter_records(_stream(data), fmt)]
+
+    report = ImportReport()
+    rows = _validate_chunk(asyncio.run(collect()), report)
+    return rows, report
+
+
+def test_csv_empty_cells_use_model_defaults():
+    rows, report = _validate(
+        b"habit_id,date,completed,sleep_hours\n"
+        b"1,2024-01-01,,\n"
+        b"1,2024-01-02,false,\n"
+        b"1,2024-01-03,,7\n",
+        "csv",
+    )
+    assert report.errors == []
+    assert rows == [
+        (2, 1, date(2024, 1, 1), True, None),
+        (3, 1, date(2024, 1, 2), False, None),
+        (4, 1, date(2024, 1, 3), True, 7),
+    ]
+
+
+def test_csv_errors_report_input_lines():
+    rows, report = _validate(
+        b"habit_id,date,completed\n"
+        b"1,2024-01-01,true\n"
+        b"\n"
+        b"x,2024-01-02,true\n"
+        b"1,2024-01-03\n"
+        b"1,,true\n",
+        "csv",
+    )
+    assert [r[0] for r in rows] == [2]
+    assert [e["line"] for e in report.errors] == [4, 5, 6]
+    assert report.errors[1]["error"] == "Unparseable row"
+
+
+def test_ndjson_errors_report_input_lines():
+    rows, report = _validate(
+        b'{"habit_id": 1, "date": "2024-01-01"}\n'
+        b"not json\n"
+        b"\n"
+        b"[1, 2]\n"
+        b'{"habit_id": 2, "date": "2024-01-05", "completed": false}',
+        "ndjson",
+    )
+    assert [(r[0], r[1], r[3]) for r in rows] == [(1, 1, True), (5, 2, False)]
+    assert [e["line"] for e in report.errors] == [2, 4]
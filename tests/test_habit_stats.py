@@ -0,0 +1,89 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services import habit_stats
+from app.services.bitsets import pack_days, is_set, with_day
+
+
+def naive_summary(days: set[date], year: int, today: date) -> dict:
+    first = date(year, 1, 1)
+    total = (date(year + 1, 1, 1) - first).days
+    if year < today.year:
+        elapsed = total
+    elif year > today.year:
+        elapsed = 0
+    else:
+        elapsed = today.timetuple().tm_yday
+    flags = [first + timedelta(days=i) in days for i in range(total)]
+    seen = flags[:elapsed]
+
+    longest = run = 0
+    for flag in flags:
+        run = run + 1 if flag else 0
+        longest = max(longest, run)
+
+    current = 0
+    if year == today.year and elapsed:
+        end = elapsed - 1 if seen[-1] else elapsed - 2
+        while end >= 0 and seen[end]:
+            current += 1
+            end -= 1
+
+    def rate(window):
+        if elapsed >= window:
+            return sum(seen[-window:]) / window
+        return sum(seen) / elapsed if elapsed else 0.0
+
+    return {
+        "completed_days": sum(seen),
+        "completion_rate": round(sum(seen) / elapsed if elapsed else 0.0, 4),
+        "last_7_days_rate": round(rate(7), 4),
+        "last_30_days_rate": round(rate(30), 4),
+        "longest_streak": longest,
+        "current_streak": current,
+    }
+
+
+def test_year_summary_matches_naive():
+    rng = random.Random(7)
+    for year, today in [
+        (2024, date(2024, 3, 1)),     # leap year, mid-year
+        (2023, date(2024, 1, 5)),     # past year
+        (2025, date(2024, 6, 1)),     # future year
+        (2024, date(2024, 1, 3)),     # shorter than the rolling windows
+    ]:
+        total = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+        habits = {}
+        for habit_id in range(1, 7):
+            density = rng.random()
+            habits[habit_id] = {
+                date(year, 1, 1) + timedelta(days=i)
+                for i in range(total)
+                if rng.random() < density
+            }
+        bits = {habit_id: pack_days(days) for habit_id, days in habits.items()}
+
+        summary = habit_stats.year_summary(bits, list(habits), year, today)
+
+        for row in summary:
+            expected = naive_summary(habits[row["habit_id"]], year, today)
+            assert {k: row[k] for k in expected} == expected, (year, today, row["habit_id"])
+
+
+def test_missing_habit_is_all_zero():
+    row = habit_stats.year_summary({}, [42], 2024, date(2024, 12, 31))[0]
+    assert row["completed_days"] == 0 and row["longest_streak"] == 0
+
+
+def test_longest_streak_matrix():
+    matrix = np.array([[1, 1, 0, 1, 1, 1], [0, 0, 0, 0, 0, 0], [1, 1, 1, 1, 1, 1]], dtype=bool)
+    assert habit_stats.longest_streak(matrix).tolist() == [3, 0, 6]
+
+
+def test_with_day_sets_and_clears():
+    day = date(2024, 12, 31)
+    bits = with_day(bytes(46), day, True)
+    assert is_set(bits, day) and bits == pack_days([day])
+    assert with_day(bits, day, False) == bytes(46)
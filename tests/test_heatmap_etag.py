@@ -0,0 +1,41 @@
+import asyncio
+from datetime import date
+
+import httpx
+
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.models.user import User
+from app.routes import habit as habit_routes
+
+
+class NewYear(date):
+    @classmethod
+    def today(cls):
+        return cls(date.today().year + 1, 1, 1)
+
+
+def test_default_year_is_part_of_the_etag(database, monkeypatch):
+    from app.main import app
+
+    with SessionLocal() as db:
+        user = User(name="viewer", email="viewer@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    async def get(extra=None):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/habits/heatmap", headers={**headers, **(extra or {})})
+
+    first = asyncio.run(get())
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert asyncio.run(get({"If-None-Match": etag})).status_code == 304
+
+    # nothing was written, but the default year rolled over
+    monkeypatch.setattr(habit_routes, "date", NewYear)
+    after = asyncio.run(get({"If-None-Match": etag}))
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from app.core.jwt_backend import FastHS256Backend, JoseBackend, make_backend
+
+KEY = "test-secret"
+
+
+@pytest.fixture
+def fast():
+    return FastHS256Backend()
+
+
+def _claims(**extra):
+    return {"sub": "42", "exp": datetime.utcnow() + timedelta(minutes=5), **extra}
+
+
+def test_tokens_are_byte_identical_to_jose(fast):
+    claims = _claims(jti="abc", role="admin")
+    assert fast.encode(claims, KEY) == JoseBackend().encode(claims, KEY)
+
+
+def test_round_trips_with_jose(fast):
+    claims = _claims()
+    assert fast.decode(JoseBackend().encode(claims, KEY), KEY)["sub"] == "42"
+    assert JoseBackend().decode(fast.encode(claims, KEY), KEY)["sub"] == "42"
+
+
+def test_wrong_key_and_tampering(fast):
+    token = fast.encode(_claims(), KEY)
+    with pytest.raises(JWTError):
+        fast.decode(token, "other-secret")
+
+    header, payload, signature = token.split(".")
+    forged = fast.encode({"sub": "1", "exp": int(time.time()) + 60}, KEY).split(".")[1]
+    with pytest.raises(JWTError):
+        fast.decode(f"{header}.{forged}.{signature}", KEY)
+
+
+def test_malformed_tokens(fast):
+    for token in ("", "abc", "a.b", "a.b.c.d", "é.é.é"):
+        with pytest.raises(JWTError):
+            fast.decode(token, KEY)
+
+
+def test_rejects_other_algorithms(fast):
+    token = jwt.encode(_claims(), KEY, algorithm="HS512")
+    with pytest.raises(JWTError):
+        fast.decode(token, KEY)
+
+
+def test_expired(fast):
+    token = fast.encode({"sub": "42", "exp": int(time.time()) - 10}, KEY)
+    with pytest.raises(ExpiredSignatureError):
+        fast.decode(token, KEY)
+
+
+def test_claim_types(fast):
+    with pytest.raises(JWTClaimsError):
+        fast.decode(fast.encode({"sub": 42}, KEY), KEY)
+    with pytest.raises(JWTClaimsError):
+        fast.decode(fast.encode({"sub": "42", "nbf": int(time.time()) + 600}, KEY), KEY)
+
+
+def test_make_backend():
+    assert make_backend("fast").name == "fast"
+    assert make_backend("jose").name == "jose"
+    with pytest.raises(ValueError):
+        make_backend("rs256")
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models.outbound_email import OutboundEmail
+from app.services.mail_queue import enqueue_email
+from app.utils.email import render_email
+
+
+def test_queued_otp_is_not_stored_in_plaintext(database):
+    with SessionLocal() as db:
+        row = enqueue_email(
+            db, "otp@example.com", "otp", {"otp": "314159"},
+            expires_at=datetime.utcnow() + timedelta(minutes=5),
+        )
+        db.commit()
+        row_id = row.id
+
+        stored = db.execute(
+            text("SELECT params FROM outbound_emails WHERE id = :id"), {"id": row_id}
+        ).scalar_one()
+        assert "314159" not in stored
+
+        # the worker still renders the code from the sealed params
+        params = db.get(OutboundEmail, row_id).params
+        subject, html_content = render_email("otp", params)
+        assert "314159" in html_content
+
+
+def test_tampered_or_purged_params_do_not_render():
+    with pytest.raises(ValueError):
+        render_email("otp", "not-a-token")
+    with pytest.raises(ValueError):
+        render_email("otp", None)
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core import otp_store as otp_store_module
+from app.core.otp_store import MemoryOTPStore
+
+EMAIL = "user@example.com"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(otp_store_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def store(clock):
+    return MemoryOTPStore(ttl=300, max_live=3, max_attempts=5, max_identifiers=100)
+
+
+def test_verify_consumes_every_live_code(store):
+    store.issue(None, EMAIL, "111111")
+    store.issue(None, EMAIL, "222222")
+    assert store.verify(None, EMAIL, "111111")
+    assert not store.verify(None, EMAIL, "222222")
+
+
+def test_codes_are_bound_to_the_identifier(store):
+    store.issue(None, EMAIL, "111111")
+    assert not store.verify(None, "other@example.com", "111111")
+    assert store.verify(None, EMAIL, "111111")
+
+
+def test_live_code_cap(store, clock):
+    for otp in ("111111", "222222", "333333"):
+        store.issue(None, EMAIL, otp)
+    with pytest.raises(HTTPException) as exc:
+        store.issue(None, EMAIL, "444444")
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "300"
+
+    clock.now += 301
+    store.issue(None, EMAIL, "444444")
+
+
+def test_failed_attempts_lock_until_codes_expire(store, clock):
+    store.issue(None, EMAIL, "111111")
+    for _ in range(5):
+        assert not store.verify(None, EMAIL, "000000")
+
+    # the right code no longer helps, and no new code can be requested
+    with pytest.raises(HTTPException) as exc:
+        store.verify(None, EMAIL, "111111")
+    assert exc.value.status_code == 429
+    with pytest.raises(HTTPException):
+        store.issue(None, EMAIL, "222222")
+
+    clock.now += 301
+    store.issue(None, EMAIL, "222222")
+    assert store.verify(None, EMAIL, "222222")
+
+
+def test_expired_codes_do_not_verify(store, clock):
+    store.issue(None, EMAIL, "111111")
+    clock.now += 300
+    assert not store.verify(None, EMAIL, "111111")
+
+
+def test_identifier_cap_evicts_oldest(clock):
+    store = MemoryOTPStore(ttl=300, max_live=3, max_attempts=5, max_identifiers=2)
+    for n in range(3):
+        store.issue(None, f"user{n}@example.com", "111111")
+    assert store.stats()["identifiers"] == 2
+    assert not store.verify(None, "user0@example.com", "111111")
+    assert store.verify(None, "user2@example.com", "111111")
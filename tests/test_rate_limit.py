@@ -0,0 +1,152 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.rate_limit import (
+    Limit,
+    MemoryRateLimitStore,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitRule,
+    SqliteRateLimitStore,
+    refill,
+    take_tokens,
+)
+
+PER_MINUTE_3 = Limit.parse("3/minute")
+PER_MINUTE_1 = Limit.parse("1/minute")
+
+
+def test_limit_parse():
+    assert Limit.parse("10/minute") == Limit(10, 10 / 60)
+    assert Limit.parse("100/hours") == Limit(100, 100 / 3600)
+
+
+def test_refill_caps_at_capacity():
+    assert refill(None, 0, 0, PER_MINUTE_3) == 3
+    assert refill(0.0, 0, 20, PER_MINUTE_3) == pytest.approx(1.0)
+    assert refill(2.0, 0, 3600, PER_MINUTE_3) == 3
+
+
+def test_take_tokens_is_all_or_nothing():
+    tokens, wait = take_tokens([(3.0, 0, PER_MINUTE_3), (1.0, 0, PER_MINUTE_1)], 0)
+    assert (tokens, wait) == ([2.0, 0.0], 0.0)
+
+    # the second bucket is empty: the first keeps its token
+    tokens, wait = take_tokens([(3.0, 0, PER_MINUTE_3), (0.0, 0, PER_MINUTE_1)], 0)
+    assert tokens == [3.0, 0.0]
+    assert wait == pytest.approx(60.0)
+
+
+def test_take_tokens_waits_for_the_slowest_bucket():
+    _, wait = take_tokens([(0.5, 0, PER_MINUTE_3), (0.0, 0, PER_MINUTE_1)], 0)
+    assert wait == pytest.approx(60.0)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryRateLimitStore(max_keys=100)
+    return SqliteRateLimitStore(str(tmp_path / "buckets.sqlite3"))
+
+
+def test_refused_identifier_does_not_debit_ip(store):
+    limiter = RateLimiter(store)
+    rule = RateLimitRule("/login", per_ip="3/minute", per_identifier="1/minute", identifier="form:username")
+    limiter.configure([rule])
+
+    async def run():
+        waits = [await limiter.check(rule, "10.0.0.1", "alice")]
+        waits += [await limiter.check(rule, "10.0.0.1", "alice") for _ in range(5)]
+        waits += [await limiter.check(rule, "10.0.0.1", name) for name in ("bob", "carol", "dave")]
+        return waits
+
+    waits = asyncio.run(run())
+    # alice once, five refusals that cost the IP nothing, then bob and carol
+    # use the remaining two IP tokens and dave is refused by the IP bucket
+    assert [w == 0 for w in waits] == [True] + [False] * 5 + [True, True, False]
+    assert limiter.stats()["rules"]["/login"] == {
+        "per_ip": "3/minute",
+        "per_identifier": "1/minute",
+        "identifier": "form:username",
+        "allowed": 3,
+        "limited": 6,
+    }
+
+
+def test_memory_store_evicts_least_recent_keys():
+    store = MemoryRateLimitStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.hit([(key, PER_MINUTE_1)])
+    assert store.size() == 2
+    # "a" was evicted, so it starts from a full bucket again
+    assert store.hit([("a", PER_MINUTE_1)]) == 0
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+
+def _client(limiter: RateLimiter) -> httpx.AsyncClient:
+    async def login(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/login", login, methods=["POST"])])
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=RateLimitMiddleware(app, limiter=limiter, enabled=True)),
+        base_url="http://test",
+    )
+
+
+def _limiter() -> RateLimiter:
+    limiter = RateLimiter(MemoryRateLimitStore(max_keys=100))
+    limiter.configure([
+        RateLimitRule("/login", per_ip="100/minute", per_identifier="2/minute", identifier="form:username"),
+    ])
+    return limiter
+
+
+def test_middleware_counts_urlencoded_and_multipart_together():
+    async def run():
+        async with _client(_limiter()) as client:
+            return [
+                (await client.post("/login", data={"username": "Alice", "password": "x"})).status_code,
+                (await client.post("/login", files={"username": (None, "alice"), "password": (None, "x")})).status_code,
+                (await client.post("/login", files={"username": (None, "ALICE "), "password": (None, "x")})).status_code,
+            ]
+
+    assert asyncio.run(run()) == [200, 200, 429]
+
+
+def test_middleware_refuses_unreadable_identifier():
+    async def run():
+        async with _client(_limiter()) as client:
+            padded = await client.post("/login", data={"username": "alice", "password": "x" * 20000})
+            as_json = await client.post("/login", json={"username": "alice"})
+            missing = await client.post("/login", data={"password": "x"})
+            return padded.status_code, as_json.status_code, missing.status_code
+
+    assert asyncio.run(run()) == (400, 400, 400)
+
+
+def test_middleware_passes_the_body_through():
+    async def echo(request):
+        form = await request.form()
+        return PlainTextResponse(form["password"])
+
+    app = Starlette(routes=[Route("/login", echo, methods=["POST"])])
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=RateLimitMiddleware(app, limiter=_limiter(), enabled=True)),
+        base_url="http://test",
+    )
+
+    async def run():
+        async with client:
+            response = await client.post("/login", files={"username": (None, "a"), "password": (None, "s3cret")})
+            return response.text
+
+    assert asyncio.run(run()) == "s3cret"
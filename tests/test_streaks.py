@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from itertools import combinations
+
+from app.services.streaks import apply_change, effective_current, streaks_from_dates
+
+START = date(2024, 2, 25)   # window spans a leap day
+DAYS = [START + timedelta(days=i) for i in range(8)]
+
+
+def naive(days: set[date]) -> tuple[int, int, date | None]:
+    if not days:
+        return 0, 0, None
+    ordered = sorted(days)
+    longest = run = 0
+    for i, day in enumerate(ordered):
+        run = run + 1 if i and day - ordered[i - 1] == timedelta(days=1) else 1
+        longest = max(longest, run)
+    last = ordered[-1]
+    current = 0
+    while last - timedelta(days=current) in days:
+        current += 1
+    return current, longest, last
+
+
+def all_subsets(items):
+    for size in range(len(items) + 1):
+        yield from (set(c) for c in combinations(items, size))
+
+
+def test_streaks_from_dates_matches_naive():
+    for days in all_subsets(DAYS):
+        assert streaks_from_dates(sorted(days)) == naive(days)
+
+
+def test_streaks_from_dates_ignores_duplicates():
+    assert streaks_from_dates([START, START, START + timedelta(days=1)]) == (2, 2, DAYS[1])
+
+
+def test_apply_change_matches_full_recompute():
+    for days in all_subsets(DAYS):
+        state = naive(days)
+        for day in DAYS + [DAYS[-1] + timedelta(days=3)]:
+            for completed in (True, False):
+                after = days | {day} if completed else days - {day}
+                new = apply_change(*state, day, completed)
+                # None means "recompute from the logs", never a wrong answer
+                if new is not None:
+                    assert new == naive(after), (sorted(days), day, completed)
+
+
+def test_apply_change_extends_and_starts_runs():
+    assert apply_change(0, 0, None, START, True) == (1, 1, START)
+    assert apply_change(1, 1, START, DAYS[1], True) == (2, 2, DAYS[1])
+    assert apply_change(2, 5, DAYS[1], DAYS[4], True) == (1, 5, DAYS[4])
+
+
+def test_effective_current():
+    today = DAYS[5]
+    assert effective_current(3, today, today) == 3
+    assert effective_current(3, DAYS[4], today) == 3
+    assert effective_current(3, DAYS[3], today) == 0
+    assert effective_current(0, None, today) == 0
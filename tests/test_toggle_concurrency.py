@@ -0,0 +1,77 @@
+import asyncio
+from collections import Counter
+from datetime import date
+
+import httpx
+
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.models.habit import Habit, HabitLog, HabitYearBits, HabitStreak
+from app.models.user import User
+from app.services.bitsets import is_set
+
+TOGGLES = 51
+
+
+def _user_with_habit(email: str) -> tuple[int, int]:
+    with SessionLocal() as db:
+        user = User(name="toggler", email=email, hashed_password="x")
+        db.add(user)
+        db.flush()
+        habit = Habit(name="run", user_id=user.id)
+        db.add(habit)
+        db.commit()
+        return user.id, habit.id
+
+
+def test_concurrent_toggles_of_one_day(database):
+    # the app module is imported here so conftest's environment applies first
+    from app.main import app
+
+    user_id, habit_id = _user_with_habit("toggler@example.com")
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    today = date.today()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def toggle():
+                response = await client.post(f"/habits/{habit_id}/toggle", json={}, headers=headers)
+                return response.status_code
+
+            # one request first so the principal is cached, then the burst
+            first = await toggle()
+            rest = await asyncio.gather(*(toggle() for _ in range(TOGGLES - 1)))
+            return Counter([first, *rest])
+
+    statuses = asyncio.run(run())
+    assert statuses == Counter({200: TOGGLES})
+
+    # odd number of toggles: the day ends up completed, and every derived
+    # table agrees with habit_logs
+    with SessionLocal() as db:
+        log = db.query(HabitLog).filter_by(habit_id=habit_id, date=today).one()
+        assert log.completed is True
+
+        bits = db.query(HabitYearBits).filter_by(habit_id=habit_id, year=today.year).one()
+        assert is_set(bits.bits, today)
+
+        streak = db.get(HabitStreak, habit_id)
+        assert (streak.current_streak, streak.last_completed_date) == (1, today)
+
+
+def test_toggle_of_someone_elses_habit(database):
+    from app.main import app
+
+    owner_id, habit_id = _user_with_habit("owner@example.com")
+    other_id, _ = _user_with_habit("other@example.com")
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(other_id)})}"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            forbidden = await client.post(f"/habits/{habit_id}/toggle", json={}, headers=headers)
+            missing = await client.post("/habits/999999/toggle", json={}, headers=headers)
+            return forbidden.status_code, missing.status_code
+
+    assert asyncio.run(run()) == (403, 404)
@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.models.user import User
+
+
+def test_user_without_email_on_both_read_paths(database):
+    from app.main import app
+
+    with SessionLocal() as db:
+        user = User(name="phone only", phone_number="+15550100", auth_provider="phone")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            orm = await client.get(f"/users/{user_id}", headers=headers)
+            fast = await client.get("/users/", params={"cursor": user_id - 1, "limit": 1}, headers=headers)
+            return orm, fast
+
+    orm, fast = asyncio.run(run())
+    assert orm.status_code == 200
+    assert fast.status_code == 200
+    assert orm.json()["email"] is None
+    assert fast.json() == [orm.json()]